@@ -0,0 +1,192 @@
+"""Benchmark de latência dos tratadores de eventos do ControleFinanceiro.
+
+Simula entrada rápida do usuário (cliques em "Adicionar", inclusive com valor inválido,
+digitação na pesquisa e troca de filtros, todos concorrentes) e mede o tempo entre o
+disparo de cada evento e a primeira renderização (page.update) que já mostra o seu
+efeito. Também confere que nenhum page.update (ex.: o aviso de valor inválido) ocorre
+enquanto outra thread remonta a árvore de controles.
+
+Uso: python benchmark_handlers.py [transacoes_iniciais] [eventos] [intervalo_ms]
+"""
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from statistics import median
+
+import financeiro
+
+
+class PaginaSimulada:
+    """Substitui ft.Page: guarda os controles e confere se page.update concorre com uma montagem"""
+
+    def __init__(self):
+        self.controls = []
+        self.dialog = None
+        self.snack_bar = None
+        self.montando = None  # Thread que está remontando a árvore de controles, se houver
+        self.atualizacoes_concorrentes = 0  # page.update chamados durante a montagem em outra thread
+
+    def add(self, *controles):
+        self.controls.extend(controles)
+
+    def update(self):
+        if self.montando not in (None, threading.get_ident()):
+            self.atualizacoes_concorrentes += 1
+
+
+def gerar_dados(quantidade):
+    """Grava um arquivo de dados sintético com a quantidade de transações informada"""
+    inicio = datetime(2020, 1, 1)
+    with open(financeiro.ARQUIVO_DADOS, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=financeiro.CAMPOS_CSV)
+        writer.writeheader()
+        for i in range(quantidade):
+            tipo = ("receita", "despesa", "investimento")[i % 3]
+            writer.writerow({
+                'id': i + 1,
+                'descricao': f"Transação sintética {i}",
+                'valor': f"{10 + i % 500:.2f}",
+                'data': (inicio + timedelta(days=i % 2000)).strftime("%d/%m/%Y"),
+                'tipo': tipo,
+                'categoria': financeiro.CATEGORIAS[tipo][i % len(financeiro.CATEGORIAS[tipo])]
+            })
+
+
+def percentil(valores, fracao):
+    """Percentil por posição (sem interpolação) de uma lista ordenada"""
+    return valores[min(len(valores) - 1, int(len(valores) * fracao))]
+
+
+async def executar(quantidade, eventos, intervalo):
+    pagina = PaginaSimulada()
+    controle = financeiro.ControleFinanceiro(pagina)
+
+    # Sinaliza as montagens para a página simulada
+    montar_original = controle.montar_interface
+
+    def montar_interface():
+        pagina.montando = threading.get_ident()
+        try:
+            montar_original()
+        finally:
+            pagina.montando = None
+    controle.montar_interface = montar_interface
+
+    # Registra (início, fim) de cada atualização completa da interface (montagem + page.update)
+    renderizacoes = []
+    atualizar_original = controle.atualizar_interface
+
+    def atualizar_interface():
+        inicio = time.perf_counter()
+        atualizar_original()
+        renderizacoes.append((inicio, time.perf_counter()))
+    controle.atualizar_interface = atualizar_interface
+
+    # Marca quando cada inclusão foi efetivamente aplicada (na ordem da fila)
+    aplicadas = []
+    executar_original = controle.executar_comando
+
+    def executar_comando(*args):
+        aplicado = executar_original(*args)
+        aplicadas.append(time.perf_counter())
+        return aplicado
+    controle.executar_comando = executar_comando
+
+    # Mede o atraso do laço de eventos: se um tratador bloquear, os ticks atrasam
+    atrasos = []
+    ativo = True
+
+    async def medir_laco():
+        while ativo:
+            antes = time.perf_counter()
+            await asyncio.sleep(0.001)
+            atrasos.append(time.perf_counter() - antes - 0.001)
+    medidor = asyncio.create_task(medir_laco())
+
+    disparos = []  # (tipo de evento, instante do disparo)
+    tarefas = []
+    descricoes = []
+    termo = "sintética"
+    filtros = ["todos", "receita", "despesa", "investimento"]
+    for i in range(eventos):
+        tipo_evento = ("adicionar", "pesquisar", "filtro", "invalido")[i % 4]
+        if tipo_evento == "invalido":
+            # Só exibe um aviso (snackbar), sem alterar dados
+            controle.input_descricao.value = "Valor inválido"
+            controle.input_valor.value = "abc"
+            corrotina = controle.adicionar_transacao(None)
+        elif tipo_evento == "adicionar":
+            descricao = f"Evento rápido {i:05d}"
+            descricoes.append(descricao)
+            controle.input_descricao.value = descricao
+            controle.input_valor.value = f"{1 + i % 97},50"
+            controle.input_data.value = "10/05/2024"
+            controle.select_tipo.value = "despesa"
+            controle.select_categoria.value = financeiro.CATEGORIAS["despesa"][0]
+            controle.select_repeticao.value = "nenhuma"
+            corrotina = controle.adicionar_transacao(None)
+        elif tipo_evento == "pesquisar":
+            controle.input_pesquisa.value = termo[:3 + (i // 4) % (len(termo) - 2)]
+            corrotina = controle.pesquisar_transacoes(None)
+        else:
+            corrotina = controle.aplicar_filtro(filtros[(i // 4) % len(filtros)])
+        disparos.append((tipo_evento, time.perf_counter()))
+        tarefas.append(asyncio.create_task(corrotina))
+        await asyncio.sleep(intervalo)  # O tratador lê o formulário antes do próximo evento
+    await asyncio.gather(*tarefas)
+    ativo = False
+    await medidor
+
+    aplicadas_iter = iter(aplicadas)
+    latencias = {"adicionar": [], "pesquisar": [], "filtro": []}
+    for tipo_evento, disparo in disparos:
+        if tipo_evento == "invalido":
+            continue
+        # O efeito está pronto no disparo (filtro/pesquisa) ou quando a inclusão foi aplicada
+        pronto = next(aplicadas_iter) if tipo_evento == "adicionar" else disparo
+        fim = next((fim for inicio, fim in renderizacoes if inicio >= pronto), None)
+        if fim is not None:
+            latencias[tipo_evento].append(fim - disparo)
+
+    # Ordem: as inclusões devem aparecer na ordem dos cliques
+    incluidas = [t.descricao for t in controle.transacoes.values() if t.descricao.startswith("Evento rápido")]
+
+    print(f"Transações iniciais: {quantidade} | eventos: {eventos} | intervalo: {intervalo * 1000:.1f} ms")
+    print(f"Renderizações: {len(renderizacoes)} (pedidos agrupados: {eventos - len(renderizacoes)})")
+    for tipo_evento, valores in latencias.items():
+        if not valores:
+            continue
+        valores.sort()
+        print(f"{tipo_evento:>10}: p50 {median(valores) * 1000:8.1f} ms | p95 {percentil(valores, 0.95) * 1000:8.1f} ms"
+              f" | máx {valores[-1] * 1000:8.1f} ms")
+    if atrasos:
+        atrasos.sort()
+        print(f"Atraso do laço de eventos: p95 {percentil(atrasos, 0.95) * 1000:.1f} ms | máx {atrasos[-1] * 1000:.1f} ms")
+    print("Ordem das inclusões preservada:", "sim" if incluidas == descricoes else "NÃO")
+    print("page.update durante montagens em outra thread:", pagina.atualizacoes_concorrentes)
+    return incluidas == descricoes and pagina.atualizacoes_concorrentes == 0
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    eventos = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    intervalo = (float(sys.argv[3]) if len(sys.argv) > 3 else 5) / 1000
+    pasta_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta:
+        # Os arquivos do aplicativo usam caminhos relativos: o benchmark roda em uma pasta temporária
+        os.chdir(pasta)
+        try:
+            gerar_dados(quantidade)
+            ordem_ok = asyncio.run(executar(quantidade, eventos, intervalo))
+        finally:
+            os.chdir(pasta_original)
+    sys.exit(0 if ordem_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,29 @@
 import flet as ft  # Framework para interface gráfica
 import csv  # Para manipulação de arquivos CSV
-from datetime import datetime  # Para trabalhar com datas
-from collections import defaultdict  # Para dicionários com valores padrão
+import io  # Para ler trechos de arquivo como CSV
+from datetime import datetime, date, timedelta  # Para trabalhar com datas
+import calendar  # Para saber quantos dias tem cada mês
+from collections import defaultdict, deque, namedtuple  # Estruturas de dados auxiliares
+from itertools import chain, islice  # Para percorrer listas sem copiá-las
 import os  # Para operações do sistema operacional
+import re  # Para gerar nomes de arquivo a partir dos nomes das contas
+import json  # Para os resumos das contas
+import unicodedata  # Para remover acentos dos nomes de arquivo
+import threading  # Para executar exportações e o monitoramento de arquivos em segundo plano
+import asyncio  # Para os tratadores de eventos assíncronos
+from functools import partial  # Para associar argumentos aos tratadores de eventos
+import time  # Para o intervalo do monitoramento de arquivos
+
+# Dependências opcionais usadas apenas na exportação de relatórios
+try:
+    from openpyxl import Workbook  # Exportação em XLSX
+except ImportError:
+    Workbook = None
+try:
+    import pyarrow as pa  # Exportação em Parquet
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
 # ================== CONFIGURAÇÕES GERAIS ================== #
 # Cores utilizadas no aplicativo
@@ -18,6 +39,31 @@ BORDER_COLOR = "#dee2e6"  # Cor das bordas
 INVESTMENT_COLOR = "#6f42c1"  # Cor para investimentos (roxo)
 SEARCH_HIGHLIGHT_COLOR = "#ffeb3b"  # Cor para destacar resultados de busca
 
+# Arquivos e exportação
+ARQUIVO_DADOS = "financas.csv"  # Arquivo onde as transações são persistidas
+CAMPOS_CSV = ['id', 'descricao', 'valor', 'data', 'tipo', 'categoria']  # Colunas do arquivo de dados
+PASTA_EXPORTACAO = "exportacoes"  # Pasta onde os relatórios exportados são gravados
+TAMANHO_BLOCO_EXPORTACAO = 5000  # Quantidade de linhas gravadas por bloco na exportação
+ARQUIVO_RECORRENCIAS = "recorrencias.csv"  # Arquivo onde as regras recorrentes são persistidas
+CAMPOS_RECORRENCIAS = ['id', 'descricao', 'valor', 'tipo', 'categoria', 'frequencia', 'inicio', 'fim']
+ARQUIVO_ORCAMENTOS = "orcamentos.csv"  # Arquivo onde os orçamentos mensais são persistidos
+CAMPOS_DIARIO = ['operacao'] + CAMPOS_CSV  # Colunas do diário de alterações
+LIMITE_DIARIO = 1000  # Entradas no diário antes de consolidar o arquivo de dados
+LIMITE_DESFAZER = 100  # Quantidade máxima de comandos que podem ser desfeitos
+ARQUIVO_CONTAS = "contas.csv"  # Cadastro das contas (nome e arquivo de dados)
+PASTA_CONTAS = "contas"  # Pasta dos arquivos das contas adicionais
+CONTA_PADRAO = "Principal"  # Conta que usa o arquivo de dados original
+INTERVALO_MONITORAMENTO = 2  # Segundos entre verificações de alterações externas no arquivo de dados
+
+# Gráficos
+LARGURA_GRAFICO = 560  # Largura (px) de cada gráfico
+PIXELS_POR_PONTO = 4  # Espaço mínimo por ponto: limita os pontos enviados à largura do gráfico
+
+# Orçamentos e previsões
+LIMITES_ALERTA_ORCAMENTO = [0.8, 1.0]  # Frações do orçamento que disparam alertas
+JANELA_PREVISAO = 6  # Quantidade de meses fechados usados para projetar cada categoria
+HORIZONTE_PREVISAO = 3  # Quantidade de meses projetados (a partir do mês atual)
+
 # Categorias pré-definidas para cada tipo de transação
 CATEGORIAS = {
     "receita": ["Salário", "Freelance", "Investimentos", "Outros"],
@@ -38,6 +84,49 @@ def carregar_logo():
         print(f"Erro ao carregar logo: {e}")
         return ft.Icon(name="account_balance", color=PRIMARY_COLOR, size=40)
 
+def indice_mes(mes_ano):
+    """Converte uma chave mm/aaaa em um número sequencial de meses (para o eixo dos gráficos)"""
+    mes, ano = mes_ano.split("/")
+    return int(ano) * 12 + int(mes) - 1
+
+def rotulo_mes(indice):
+    """Converte um número sequencial de meses de volta para mm/aaaa"""
+    return f"{int(indice) % 12 + 1:02d}/{int(indice) // 12}"
+
+def reduzir_serie(pontos, limite):
+    """Reduz uma série [(x, y)] a no máximo limite pontos pelo algoritmo LTTB.
+
+    O Largest-Triangle-Three-Buckets divide a série em baldes e mantém, de cada um,
+    o ponto que forma o maior triângulo com o ponto escolhido antes e a média do
+    balde seguinte, preservando picos e vales visíveis no gráfico.
+    """
+    total = len(pontos)
+    if limite >= total or limite < 3:
+        return list(pontos)
+
+    amostra = [pontos[0]]  # O primeiro e o último ponto são sempre mantidos
+    tamanho_balde = (total - 2) / (limite - 2)
+    anterior = 0
+    for balde in range(limite - 2):
+        # Média do próximo balde (ou o último ponto, no fim da série)
+        inicio_prox = int((balde + 1) * tamanho_balde) + 1
+        fim_prox = min(int((balde + 2) * tamanho_balde) + 1, total)
+        proximos = pontos[inicio_prox:fim_prox] or [pontos[-1]]
+        media_x = sum(p[0] for p in proximos) / len(proximos)
+        media_y = sum(p[1] for p in proximos) / len(proximos)
+
+        # Escolhe o ponto do balde atual com o maior triângulo
+        ax, ay = pontos[anterior]
+        inicio = int(balde * tamanho_balde) + 1
+        fim = int((balde + 1) * tamanho_balde) + 1
+        anterior = max(
+            range(inicio, fim),
+            key=lambda j: abs((ax - media_x) * (pontos[j][1] - ay) - (ax - pontos[j][0]) * (media_y - ay))
+        )
+        amostra.append(pontos[anterior])
+    amostra.append(pontos[-1])
+    return amostra
+
 # ================== MODELO DE DADOS ================== #
 class Transacao:
     """Classe que representa uma transação financeira"""
@@ -48,6 +137,655 @@ class Transacao:
         self.tipo = tipo  # Tipo: receita, despesa ou investimento
         self.categoria = categoria  # Categoria da transação
         self.id = datetime.now().timestamp()  # ID único baseado no timestamp
+        self.recorrencia = None  # ID da regra recorrente que gerou a transação (se houver)
+
+    @classmethod
+    def de_dict(cls, campos):
+        """Cria uma transação a partir de um dicionário com os campos do CSV"""
+        transacao = cls(
+            campos['descricao'],
+            campos['valor'],
+            campos['data'],
+            campos['tipo'],
+            campos.get('categoria') or 'Outros'
+        )
+        if campos.get('id'):
+            transacao.id = float(campos['id'])
+        return transacao
+
+    def para_dict(self):
+        """Retorna os campos da transação no formato do CSV"""
+        return {campo: getattr(self, campo) for campo in CAMPOS_CSV}
+
+    def atualizar(self, campos):
+        """Altera apenas os campos informados"""
+        for campo, valor in campos.items():
+            setattr(self, campo, float(valor) if campo == 'valor' else valor)
+
+    def assinatura(self):
+        """Hash dos campos, usado para saber se a linha mudou no arquivo"""
+        return hash(tuple(self.para_dict().values()))
+
+class RegraRecorrente:
+    """Regra que gera transações periódicas (semanal, mensal ou anual) sob demanda"""
+    FREQUENCIAS = {"semanal": "Semanal", "mensal": "Mensal", "anual": "Anual"}
+
+    def __init__(self, descricao, valor, tipo, categoria, frequencia, inicio, fim=""):
+        self.descricao = descricao  # Descrição usada nas ocorrências
+        self.valor = float(valor)  # Valor de cada ocorrência
+        self.tipo = tipo  # Tipo: receita, despesa ou investimento
+        self.categoria = categoria  # Categoria das ocorrências
+        self.frequencia = frequencia  # semanal, mensal ou anual
+        self.inicio = inicio  # Data da primeira ocorrência (dd/mm/aaaa)
+        self.fim = fim  # Data limite das ocorrências (dd/mm/aaaa) ou vazio se não houver
+        self.id = datetime.now().timestamp()  # ID único baseado no timestamp
+        self._data_inicio = datetime.strptime(inicio, "%d/%m/%Y").date()
+        self._data_fim = datetime.strptime(fim, "%d/%m/%Y").date() if fim else None
+
+    def data_ocorrencia(self, indice):
+        """Retorna a data da ocorrência de número indice (0 = primeira)"""
+        inicio = self._data_inicio
+        if self.frequencia == "semanal":
+            return inicio + timedelta(weeks=indice)
+        if self.frequencia == "mensal":
+            meses = inicio.month - 1 + indice
+            ano, mes = inicio.year + meses // 12, meses % 12 + 1
+        else:
+            ano, mes = inicio.year + indice, inicio.month
+        # Ajusta dias inexistentes no mês (ex.: 31 em abril, 29/02 em ano não bissexto)
+        dia = min(inicio.day, calendar.monthrange(ano, mes)[1])
+        return date(ano, mes, dia)
+
+    def _primeiro_indice_apos(self, desde):
+        """Calcula diretamente o índice da primeira ocorrência posterior a desde"""
+        if desde is None or desde < self._data_inicio:
+            return 0
+        if self.frequencia == "semanal":
+            indice = (desde - self._data_inicio).days // 7
+        elif self.frequencia == "mensal":
+            indice = (desde.year - self._data_inicio.year) * 12 + desde.month - self._data_inicio.month
+        else:
+            indice = desde.year - self._data_inicio.year
+        indice = max(indice, 0)
+        # A estimativa erra no máximo por uma ocorrência por causa do dia do mês
+        while self.data_ocorrencia(indice) <= desde:
+            indice += 1
+        while indice > 0 and self.data_ocorrencia(indice - 1) > desde:
+            indice -= 1
+        return indice
+
+    def ocorrencias_entre(self, desde, ate):
+        """Gera as datas das ocorrências no intervalo (desde, ate] sem percorrer as anteriores"""
+        if self._data_fim is not None and self._data_fim < ate:
+            ate = self._data_fim
+        indice = self._primeiro_indice_apos(desde)
+        data = self.data_ocorrencia(indice)
+        while data <= ate:
+            yield data
+            indice += 1
+            data = self.data_ocorrencia(indice)
+
+    def criar_ocorrencia(self, data):
+        """Cria a transação correspondente à ocorrência da regra na data informada"""
+        transacao = Transacao(self.descricao, self.valor, data.strftime("%d/%m/%Y"), self.tipo, self.categoria)
+        transacao.id = f"{self.id}@{transacao.data}"  # ID derivado da regra e da data
+        transacao.recorrencia = self.id
+        return transacao
+
+    def encerrar(self, fim):
+        """Define a data limite da regra; retorna False se ela já termina antes"""
+        if self._data_fim is not None and self._data_fim <= fim:
+            return False
+        self._data_fim = fim
+        self.fim = fim.strftime("%d/%m/%Y")
+        return True
+
+# ================== AGREGADOS ================== #
+class AgregadosFinanceiros:
+    """Mantém totais e lucros por período atualizados de forma incremental"""
+    def __init__(self):
+        self.totais = {"receita": 0.0, "despesa": 0.0, "investimento": 0.0}  # Total por tipo
+        self.lucro_mensal = {}  # Lucro por mês/ano (chave mm/aaaa)
+        self.lucro_anual = {}  # Lucro por ano (chave aaaa)
+        self.gastos_categoria = defaultdict(dict)  # (tipo, categoria) -> {mm/aaaa: valor}
+        self._contagem = defaultdict(int)  # Lançamentos por chave, para remover períodos vazios
+        self.ouvintes = []  # Funções chamadas com (tipo, categoria, mm/aaaa, valor anterior) a cada alteração
+
+    def _acumular(self, dicionario, chave, valor, fator, chave_contagem):
+        """Soma o valor na chave e remove a chave quando não restam lançamentos nela"""
+        self._contagem[chave_contagem] += fator
+        if self._contagem[chave_contagem] <= 0:
+            del self._contagem[chave_contagem]
+            dicionario.pop(chave, None)
+        else:
+            dicionario[chave] = dicionario.get(chave, 0.0) + valor * fator
+
+    def aplicar(self, transacao, fator=1):
+        """Soma (fator=1) ou subtrai (fator=-1) uma transação dos agregados"""
+        self.totais[transacao.tipo] = self.totais.get(transacao.tipo, 0.0) + transacao.valor * fator
+        try:
+            data = datetime.strptime(transacao.data, "%d/%m/%Y")
+        except ValueError:
+            return  # Datas inválidas entram nos totais mas não nos períodos
+        # Despesas e investimentos reduzem o lucro
+        sinal = -1 if transacao.tipo in ("despesa", "investimento") else 1
+        mes_ano = data.strftime("%m/%Y")
+        ano = data.strftime("%Y")
+        chave_categoria = (transacao.tipo, transacao.categoria)
+        anterior = self.valor_categoria(transacao.tipo, transacao.categoria, mes_ano)
+        self._acumular(self.lucro_mensal, mes_ano, transacao.valor * sinal, fator, ("mes", mes_ano))
+        self._acumular(self.lucro_anual, ano, transacao.valor * sinal, fator, ("ano", ano))
+        self._acumular(self.gastos_categoria[chave_categoria], mes_ano, transacao.valor, fator,
+                       ("categoria", chave_categoria, mes_ano))
+        for ouvinte in self.ouvintes:
+            ouvinte(transacao.tipo, transacao.categoria, mes_ano, anterior)
+
+    def valor_categoria(self, tipo, categoria, mes_ano):
+        """Retorna o valor acumulado de uma categoria em um mês (mm/aaaa)"""
+        return self.gastos_categoria.get((tipo, categoria), {}).get(mes_ano, 0.0)
+
+    def adicionar(self, transacao):
+        """Inclui uma transação nos agregados"""
+        self.aplicar(transacao, 1)
+
+    def remover(self, transacao):
+        """Retira uma transação dos agregados"""
+        self.aplicar(transacao, -1)
+
+# ================== ÍNDICE DE PESQUISA ================== #
+class IndicePesquisa:
+    """Índice de trigramas das descrições, para pesquisar trechos sem varrer todas as transações"""
+    def __init__(self):
+        self._trigramas = defaultdict(set)  # Trigrama -> IDs das transações que o contêm
+        self._textos = {}  # ID -> descrição em minúsculas
+
+    @staticmethod
+    def _gerar_trigramas(texto):
+        """Retorna o conjunto de trigramas (trechos de 3 caracteres) do texto"""
+        return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+    def adicionar(self, transacao_id, descricao):
+        """Indexa a descrição de uma transação"""
+        texto = descricao.lower()
+        self._textos[transacao_id] = texto
+        for trigrama in self._gerar_trigramas(texto):
+            self._trigramas[trigrama].add(transacao_id)
+
+    def remover(self, transacao_id):
+        """Remove uma transação do índice"""
+        texto = self._textos.pop(transacao_id, None)
+        if texto is None:
+            return
+        for trigrama in self._gerar_trigramas(texto):
+            ids = self._trigramas[trigrama]
+            ids.discard(transacao_id)
+            if not ids:
+                del self._trigramas[trigrama]
+
+    def buscar(self, termo):
+        """Retorna os IDs cujas descrições contêm o termo, ou None se o termo for curto demais"""
+        termo = termo.lower()
+        trigramas = self._gerar_trigramas(termo)
+        if not trigramas:
+            return None  # Termos com menos de 3 caracteres exigem varredura
+        # Intersecta a partir da menor lista para reduzir o trabalho
+        listas = sorted((self._trigramas.get(t, set()) for t in trigramas), key=len)
+        candidatos = set(listas[0]).intersection(*listas[1:])
+        # Trigramas em comum não garantem o trecho contíguo: confirma cada candidato
+        return {i for i in candidatos if termo in self._textos[i]}
+
+# ================== HISTÓRICO DE ALTERAÇÕES ================== #
+# Comando reversível: campos antes e depois da alteração (None em "antes" indica inclusão
+# e None em "depois" indica exclusão; em edições, apenas os campos alterados são guardados)
+Comando = namedtuple("Comando", ["transacao_id", "antes", "depois"])
+
+class HistoricoComandos:
+    """Pilhas de desfazer/refazer com os deltas de cada comando executado"""
+    def __init__(self, limite=LIMITE_DESFAZER):
+        self.pilha_desfazer = deque(maxlen=limite)  # Comandos mais antigos são descartados
+        self.pilha_refazer = []
+
+    def registrar(self, comando):
+        """Registra um novo comando, invalidando o que poderia ser refeito"""
+        self.pilha_desfazer.append(comando)
+        self.pilha_refazer.clear()
+
+    def desfazer(self):
+        """Retorna o comando inverso do último executado (ou None se não houver)"""
+        if not self.pilha_desfazer:
+            return None
+        comando = self.pilha_desfazer.pop()
+        self.pilha_refazer.append(comando)
+        return Comando(comando.transacao_id, comando.depois, comando.antes)
+
+    def refazer(self):
+        """Retorna o último comando desfeito para ser aplicado novamente (ou None)"""
+        if not self.pilha_refazer:
+            return None
+        comando = self.pilha_refazer.pop()
+        self.pilha_desfazer.append(comando)
+        return comando
+
+    def descartar(self, desfeito):
+        """Descarta o comando recém desfeito (desfeito=True) ou refeito que não pôde ser aplicado"""
+        (self.pilha_refazer if desfeito else self.pilha_desfazer).pop()
+
+class DiarioAlteracoes:
+    """Diário (somente inclusão) das alterações feitas desde a última gravação do arquivo de dados"""
+    def __init__(self, caminho):
+        self.caminho = caminho  # Arquivo do diário
+        self.entradas = 0  # Entradas registradas no diário
+
+    def registrar(self, operacao, campos):
+        """Acrescenta uma entrada ao fim do diário"""
+        novo = not os.path.exists(self.caminho) or os.path.getsize(self.caminho) == 0
+        with open(self.caminho, mode='a', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=CAMPOS_DIARIO)
+            if novo:
+                writer.writeheader()
+            writer.writerow({'operacao': operacao, **campos})
+        self.entradas += 1
+
+    def ler(self):
+        """Gera as entradas (operação, campos) do diário; campos vazios não foram alterados"""
+        self.entradas = 0
+        if not os.path.exists(self.caminho):
+            return
+        with open(self.caminho, mode='r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                self.entradas += 1
+                operacao = row.pop('operacao')
+                yield operacao, {campo: valor for campo, valor in row.items() if valor}
+
+    def limpar(self):
+        """Descarta o diário depois que o arquivo de dados foi regravado"""
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
+        self.entradas = 0
+
+# ================== CONTAS ================== #
+class Conta:
+    """Conta (livro-caixa) com seus próprios arquivos de dados, diário, recorrências e resumo"""
+    def __init__(self, nome, arquivo):
+        self.nome = nome  # Nome exibido da conta
+        self.arquivo_dados = arquivo  # Arquivo CSV com as transações
+        base = os.path.splitext(arquivo)[0]
+        self.arquivo_diario = f"{base}.diario.csv"  # Diário de alterações não consolidadas
+        # A conta original mantém o nome de arquivo de recorrências usado antes das contas
+        self.arquivo_recorrencias = ARQUIVO_RECORRENCIAS if arquivo == ARQUIVO_DADOS else f"{base}.recorrencias.csv"
+        self.arquivo_resumo = f"{base}.resumo.json"  # Agregados salvos para a visão consolidada
+
+    @staticmethod
+    def carregar_todas():
+        """Lê o cadastro de contas; sem cadastro, existe apenas a conta padrão"""
+        contas = []
+        if os.path.exists(ARQUIVO_CONTAS):
+            with open(ARQUIVO_CONTAS, mode='r', newline='', encoding='utf-8') as file:
+                contas = [Conta(row['nome'], row['arquivo']) for row in csv.DictReader(file)]
+        return contas or [Conta(CONTA_PADRAO, ARQUIVO_DADOS)]
+
+    @staticmethod
+    def salvar_todas(contas):
+        """Grava o cadastro de contas"""
+        with open(ARQUIVO_CONTAS, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=['nome', 'arquivo'])
+            writer.writeheader()
+            for conta in contas:
+                writer.writerow({'nome': conta.nome, 'arquivo': conta.arquivo_dados})
+
+    @staticmethod
+    def nova(nome, contas):
+        """Cria uma conta com um arquivo de dados ainda não usado por outra conta"""
+        sem_acentos = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode("ascii")
+        base = re.sub(r"[^a-z0-9]+", "_", sem_acentos.lower()).strip("_") or "conta"
+        usados = {conta.arquivo_dados for conta in contas}
+        arquivo = os.path.join(PASTA_CONTAS, f"{base}.csv")
+        sufixo = 2
+        while arquivo in usados:
+            arquivo = os.path.join(PASTA_CONTAS, f"{base}_{sufixo}.csv")
+            sufixo += 1
+        os.makedirs(PASTA_CONTAS, exist_ok=True)
+        return Conta(nome, arquivo)
+
+    def ler_transacoes(self, diario, base=None, ids_diario=None):
+        """Lê as transações do arquivo de dados e reaplica as alterações do diário.
+
+        Se informados, base recebe a assinatura de cada linha do arquivo (antes do
+        diário) e ids_diario recebe os IDs alterados pelo diário.
+        """
+        transacoes = {}
+        if os.path.exists(self.arquivo_dados):
+            with open(self.arquivo_dados, mode='r', newline='', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                for row in reader:
+                    # Cria uma nova transação para cada linha do CSV
+                    transacao = Transacao.de_dict(row)
+                    transacoes[transacao.id] = transacao
+                    if base is not None:
+                        base[transacao.id] = transacao.assinatura()
+
+        # Reaplica as alterações registradas no diário desde a última gravação
+        for operacao, campos in diario.ler():
+            transacao_id = float(campos.pop('id'))
+            if ids_diario is not None:
+                ids_diario.add(transacao_id)
+            if operacao == "adicionar":
+                transacoes[transacao_id] = Transacao.de_dict({'id': transacao_id, **campos})
+            elif operacao == "excluir":
+                transacoes.pop(transacao_id, None)
+            elif transacao_id in transacoes:
+                transacoes[transacao_id].atualizar(campos)
+        return transacoes
+
+    def ler_regras(self):
+        """Lê as regras recorrentes da conta"""
+        regras = []
+        if os.path.exists(self.arquivo_recorrencias):
+            with open(self.arquivo_recorrencias, mode='r', newline='', encoding='utf-8') as file:
+                for row in csv.DictReader(file):
+                    regra = RegraRecorrente(
+                        row['descricao'],
+                        row['valor'],
+                        row['tipo'],
+                        row['categoria'],
+                        row['frequencia'],
+                        row['inicio'],
+                        row.get('fim', '')
+                    )
+                    regra.id = float(row['id'])
+                    regras.append(regra)
+        return regras
+
+    def salvar_resumo(self, agregados):
+        """Grava os totais e lucros por período da conta (calculados até hoje)"""
+        resumo = {
+            'data': date.today().isoformat(),
+            'totais': agregados.totais,
+            'lucro_mensal': agregados.lucro_mensal,
+            'lucro_anual': agregados.lucro_anual
+        }
+        with open(self.arquivo_resumo, mode='w', encoding='utf-8') as file:
+            json.dump(resumo, file)
+        return resumo
+
+    def ler_resumo(self):
+        """Retorna o resumo da conta, recalculando-o só se os arquivos mudaram depois dele"""
+        if os.path.exists(self.arquivo_resumo):
+            gravado_em = os.path.getmtime(self.arquivo_resumo)
+            arquivos = [self.arquivo_dados, self.arquivo_diario, self.arquivo_recorrencias]
+            atualizado = all(not os.path.exists(a) or os.path.getmtime(a) <= gravado_em for a in arquivos)
+            with open(self.arquivo_resumo, mode='r', encoding='utf-8') as file:
+                resumo = json.load(file)
+            # Com recorrências, o resumo também depende do dia em que foi calculado
+            if atualizado and (resumo['data'] == date.today().isoformat()
+                               or not os.path.exists(self.arquivo_recorrencias)):
+                return resumo
+        return self.calcular_resumo()
+
+    def calcular_resumo(self):
+        """Lê a conta uma vez para recalcular o resumo (as transações não ficam em memória)"""
+        agregados = AgregadosFinanceiros()
+        for transacao in self.ler_transacoes(DiarioAlteracoes(self.arquivo_diario)).values():
+            agregados.adicionar(transacao)
+        for regra in self.ler_regras():
+            for data in regra.ocorrencias_entre(None, date.today()):
+                agregados.adicionar(regra.criar_ocorrencia(data))
+        return self.salvar_resumo(agregados)
+
+# ================== MONITORAMENTO DE ARQUIVOS ================== #
+class MonitorArquivo:
+    """Detecta alterações externas no arquivo de dados pela data de modificação e pelo tamanho"""
+    TAMANHO_CAUDA = 64  # Bytes finais guardados para saber se o arquivo só recebeu linhas novas
+
+    def __init__(self, caminho):
+        self.caminho = caminho  # Arquivo monitorado
+        self.registrar()
+
+    def _estado(self):
+        """Retorna (data de modificação, tamanho) do arquivo, ou None se ele não existir"""
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def _ler_cauda(self, fim):
+        """Lê os bytes que antecedem a posição fim"""
+        with open(self.caminho, mode='rb') as file:
+            file.seek(max(fim - self.TAMANHO_CAUDA, 0))
+            return file.read(min(fim, self.TAMANHO_CAUDA))
+
+    def registrar(self):
+        """Memoriza o estado atual do arquivo (após uma leitura ou gravação feita pelo próprio app)"""
+        self.confirmar(self._estado())
+
+    def confirmar(self, estado):
+        """Memoriza o estado devolvido por uma leitura, depois que as linhas foram processadas"""
+        self.estado = estado
+        self.cauda = self._ler_cauda(estado[1]) if estado else b""
+
+    def verificar(self):
+        """Retorna None se nada mudou, "anexado" se só houve linhas acrescentadas ou "alterado" """
+        atual = self._estado()
+        if atual == self.estado:
+            return None
+        if self.estado and atual and atual[1] > self.estado[1] and self._ler_cauda(self.estado[1]) == self.cauda:
+            return "anexado"
+        return "alterado"
+
+    def ler_anexadas(self):
+        """Lê apenas as linhas completas acrescentadas desde o último estado registrado.
+
+        Retorna (linhas, estado); o estado só é memorizado quando confirmar() for chamado.
+        """
+        inicio = self.estado[1]
+        with open(self.caminho, mode='rb') as file:
+            cabecalho = next(csv.reader([file.readline().decode('utf-8')]))
+            file.seek(inicio)
+            novos = file.read()
+        # Uma linha ainda sem quebra final pode estar sendo gravada: fica para a próxima verificação
+        consumido = novos.rfind(b"\n") + 1
+        texto = novos[:consumido].decode('utf-8')
+        estado = (self._estado()[0], inicio + consumido) if consumido else self.estado
+        return list(csv.DictReader(io.StringIO(texto), fieldnames=cabecalho)), estado
+
+    def ler_todas(self):
+        """Lê todas as linhas do arquivo; retorna (linhas, estado) como ler_anexadas"""
+        # O estado é obtido antes da leitura: uma gravação durante a leitura será vista na próxima verificação
+        estado = self._estado()
+        linhas = []
+        if estado:
+            with open(self.caminho, mode='r', newline='', encoding='utf-8') as file:
+                linhas = list(csv.DictReader(file))
+        return linhas, estado
+
+# ================== PREVISÕES ================== #
+class PrevisorFluxoCaixa:
+    """Projeta o lucro dos próximos meses por categoria, com cache invalidado por categoria/período"""
+    METODOS = {"media": "Média móvel", "tendencia": "Tendência linear"}
+
+    def __init__(self, agregados, janela=JANELA_PREVISAO, horizonte=HORIZONTE_PREVISAO):
+        self.agregados = agregados  # Fonte das séries mensais por categoria
+        self.janela = janela  # Meses fechados considerados na projeção
+        self.horizonte = horizonte  # Meses projetados
+        self.metodo = "media"  # Método de projeção ativo
+        self._cache = {}  # (tipo, categoria) -> valores projetados
+        self._total = None  # Projeção consolidada [(mm/aaaa, lucro)] ou None se inválida
+        self._referencia = None  # (ano, mês) do mês atual quando o cache foi montado
+        self._meses_janela = set()  # Chaves mm/aaaa que fazem parte da janela atual
+        agregados.ouvintes.append(self.invalidar)
+
+    def _atualizar_referencia(self):
+        """Descarta o cache quando o mês atual muda, pois a janela se desloca"""
+        hoje = date.today()
+        referencia = (hoje.year, hoje.month)
+        if referencia == self._referencia:
+            return
+        self._referencia = referencia
+        self._meses_janela = set(self._meses(-self.janela, 0))
+        self._cache.clear()
+        self._total = None
+
+    def _meses(self, inicio, fim):
+        """Lista as chaves mm/aaaa dos meses no intervalo [inicio, fim) relativos ao mês atual"""
+        ano, mes = self._referencia
+        chaves = []
+        for deslocamento in range(inicio, fim):
+            meses = ano * 12 + mes - 1 + deslocamento
+            chaves.append(f"{meses % 12 + 1:02d}/{meses // 12}")
+        return chaves
+
+    def invalidar(self, tipo, categoria, mes_ano, anterior=None):
+        """Descarta a projeção da categoria se o mês alterado fizer parte da janela"""
+        if mes_ano in self._meses_janela:
+            self._cache.pop((tipo, categoria), None)
+            self._total = None
+
+    def definir_metodo(self, metodo):
+        """Troca o método de projeção, descartando as projeções calculadas com o anterior"""
+        if metodo != self.metodo:
+            self.metodo = metodo
+            self._cache.clear()
+            self._total = None
+
+    def projetar_categoria(self, tipo, categoria):
+        """Retorna os valores projetados da categoria para os próximos meses (usando o cache)"""
+        self._atualizar_referencia()
+        chave = (tipo, categoria)
+        if chave not in self._cache:
+            serie = [self.agregados.valor_categoria(tipo, categoria, mes_ano)
+                     for mes_ano in self._meses(-self.janela, 0)]
+            if self.metodo == "tendencia":
+                projecao = self._tendencia_linear(serie)
+            else:
+                media = sum(serie) / len(serie)
+                projecao = [media] * self.horizonte
+            self._cache[chave] = projecao
+        return self._cache[chave]
+
+    def _tendencia_linear(self, serie):
+        """Ajusta uma reta por mínimos quadrados e a prolonga pelo horizonte"""
+        n = len(serie)
+        media_x = (n - 1) / 2
+        media_y = sum(serie) / n
+        variancia = sum((x - media_x) ** 2 for x in range(n))
+        inclinacao = sum((x - media_x) * (y - media_y) for x, y in enumerate(serie)) / variancia if variancia else 0.0
+        # Valores de uma categoria não ficam negativos (o sinal é aplicado no lucro)
+        return [max(media_y + inclinacao * (n + passo - media_x), 0.0) for passo in range(self.horizonte)]
+
+    def projetar_lucro(self):
+        """Soma as projeções das categorias no lucro mensal previsto [(mm/aaaa, lucro)]"""
+        self._atualizar_referencia()
+        if self._total is None:
+            totais = [0.0] * self.horizonte
+            for tipo, categoria in list(self.agregados.gastos_categoria):
+                sinal = -1 if tipo in ("despesa", "investimento") else 1
+                for i, valor in enumerate(self.projetar_categoria(tipo, categoria)):
+                    totais[i] += valor * sinal
+            self._total = list(zip(self._meses(0, self.horizonte), totais))
+        return self._total
+
+# ================== EXPORTAÇÃO DE RELATÓRIOS ================== #
+class ExportadorRelatorios:
+    """Exporta relatórios para CSV, XLSX ou Parquet gravando em blocos de tamanho fixo"""
+    FORMATOS = ["csv", "xlsx", "parquet"]
+
+    def __init__(self, pasta=PASTA_EXPORTACAO, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+        self.pasta = pasta  # Pasta de destino dos arquivos
+        self.tamanho_bloco = tamanho_bloco  # Linhas por bloco gravado
+
+    def exportar(self, nome, formato, colunas, fonte, converter, filtro=None, ao_progredir=None, total=None):
+        """Percorre a fonte uma única vez e grava as linhas convertidas bloco a bloco.
+
+        Apenas um bloco fica em memória por vez, então o consumo não depende do
+        tamanho da fonte. O progresso é informado como fração dos itens percorridos;
+        para fontes sem len() (ex.: itertools.chain) informe o total esperado.
+        """
+        if formato not in self.FORMATOS:
+            raise ValueError(f"Formato de exportação desconhecido: {formato}")
+        if formato == "xlsx" and Workbook is None:
+            raise RuntimeError("Instale o pacote openpyxl para exportar em XLSX")
+        if formato == "parquet" and pq is None:
+            raise RuntimeError("Instale o pacote pyarrow para exportar em Parquet")
+
+        os.makedirs(self.pasta, exist_ok=True)
+        carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+        caminho = os.path.join(self.pasta, f"{nome}_{carimbo}.{formato}")
+        blocos = self._gerar_blocos(fonte, converter, filtro, ao_progredir, total)
+        escritor = getattr(self, f"_escrever_{formato}")
+        escritor(caminho, colunas, blocos)
+        return caminho
+
+    def _gerar_blocos(self, fonte, converter, filtro, ao_progredir, total=None):
+        """Agrupa as linhas convertidas em listas de até tamanho_bloco itens"""
+        if total is None:
+            total = len(fonte)
+        bloco = []
+        # Limita a leitura ao tamanho inicial: itens incluídos durante a exportação ficam de fora
+        for processados, item in enumerate(islice(fonte, total), start=1):
+            if filtro is None or filtro(item):
+                bloco.append(converter(item))
+            if len(bloco) >= self.tamanho_bloco:
+                yield bloco
+                bloco = []
+                if ao_progredir:
+                    ao_progredir(processados / max(total, 1))
+        if bloco:
+            yield bloco
+        if ao_progredir:
+            ao_progredir(1.0)
+
+    def _escrever_csv(self, caminho, colunas, blocos):
+        """Grava os blocos em um arquivo CSV"""
+        with open(caminho, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(colunas)
+            for bloco in blocos:
+                writer.writerows(bloco)
+
+    def _escrever_xlsx(self, caminho, colunas, blocos):
+        """Grava os blocos em uma planilha XLSX no modo somente escrita do openpyxl"""
+        workbook = Workbook(write_only=True)  # Modo que não mantém as células em memória
+        planilha = workbook.create_sheet("Relatório")
+        planilha.append(colunas)
+        for bloco in blocos:
+            for linha in bloco:
+                planilha.append(list(linha))
+        workbook.save(caminho)
+
+    def _escrever_parquet(self, caminho, colunas, blocos):
+        """Grava cada bloco como um row group de um arquivo Parquet"""
+        writer = None
+        try:
+            for bloco in blocos:
+                dados = {coluna: [linha[i] for linha in bloco] for i, coluna in enumerate(colunas)}
+                if writer is None:
+                    tabela = pa.Table.from_pydict(dados)
+                    writer = pq.ParquetWriter(caminho, tabela.schema)
+                else:
+                    tabela = pa.Table.from_pydict(dados, schema=writer.schema)
+                writer.write_table(tabela)
+            if writer is None:
+                # Nenhuma linha exportada: grava apenas o esquema com colunas de texto
+                esquema = pa.schema([(coluna, pa.string()) for coluna in colunas])
+                writer = pq.ParquetWriter(caminho, esquema)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def exportar_em_segundo_plano(self, ao_concluir, ao_falhar, *args, **kwargs):
+        """Executa exportar() em uma thread separada e notifica o resultado por callbacks"""
+        def executar():
+            try:
+                caminho = self.exportar(*args, **kwargs)
+            except Exception as e:
+                ao_falhar(e)
+            else:
+                ao_concluir(caminho)
+
+        thread = threading.Thread(target=executar, daemon=True)
+        thread.start()
+        return thread
 
 # ================== CONTROLE PRINCIPAL ================== #
 class ControleFinanceiro:
@@ -55,12 +793,56 @@ class ControleFinanceiro:
     def __init__(self, page):
         self.page = page  # Página principal do Flet
         self.setup_page()  # Configura a página
-        self.transacoes = []  # Lista para armazenar todas as transações
         self.filtro_ativo = "todos"  # Filtro ativo inicialmente
         self.termo_pesquisa = ""  # Termo de pesquisa vazio inicialmente
-        self.carregar_dados()  # Carrega dados do arquivo CSV
+        self.exportador = ExportadorRelatorios()  # Responsável pelas exportações de relatórios
+        self.exportando = False  # Indica se há uma exportação em andamento
+        self.zoom_graficos = None  # Intervalo de meses (início, fim) exibido nos gráficos, ou None para tudo
+        self.contas = Conta.carregar_todas()  # Contas cadastradas
+        self.resumos_contas = {}  # Resumos das contas inativas já lidos (nome -> resumo)
+        self.trava_dados = threading.RLock()  # Serializa alterações feitas pela interface e pelo monitor
+        self.trava_alteracoes = asyncio.Lock()  # Executa as alterações na ordem dos cliques (fila FIFO)
+        self.trava_interface = asyncio.Lock()  # Impede duas montagens simultâneas da interface
+        self.geracao_interface = 0  # Contador de pedidos de atualização da interface
+        self.preparar_conta(self.contas[0])  # Ativa a primeira conta e carrega seus dados
+        self.orcamentos = {}  # Orçamento mensal por categoria de despesa
+        self.carregar_orcamentos()  # Carrega os orçamentos definidos
         self.criar_componentes()  # Cria os componentes da interface
         self.montar_layout()  # Monta o layout da interface
+        # Verifica periodicamente se outro programa alterou o arquivo de dados
+        threading.Thread(target=self.monitorar_arquivo, daemon=True).start()
+
+    def preparar_conta(self, conta):
+        """Reinicia o estado do livro-caixa e carrega apenas as transações da conta informada"""
+        with self.trava_dados:
+            self._preparar_conta(conta)
+
+    def _preparar_conta(self, conta):
+        """Executa preparar_conta com a trava de dados já adquirida"""
+        metodo_previsao = self.previsor.metodo if hasattr(self, "previsor") else "media"
+        self.conta_ativa = conta  # Conta cujas transações estão em memória
+        self.transacoes = {}  # Transações indexadas pelo ID
+        self.historico = HistoricoComandos()  # Pilhas de desfazer/refazer
+        self.diario = DiarioAlteracoes(conta.arquivo_diario)  # Alterações ainda não consolidadas
+        self.indice_pesquisa = IndicePesquisa()  # Índice das descrições para a pesquisa
+        self.transacao_em_edicao = None  # ID da transação sendo editada na tabela
+        self.agregados = AgregadosFinanceiros()  # Totais e lucros por período mantidos incrementalmente
+        self.gastos_pendentes = {}  # (categoria, mm/aaaa) -> gasto antes das alterações ainda não verificadas
+        self.agregados.ouvintes.append(self.registrar_gasto)
+        self.regras = []  # Regras de transações recorrentes
+        self.ocorrencias = []  # Ocorrências das regras já materializadas até o horizonte
+        self.horizonte_recorrencias = None  # Data até a qual as recorrências foram materializadas
+        self.resumo_pendente = True  # Indica que o resumo salvo da conta está desatualizado
+        self.base_arquivo = {}  # Assinatura de cada linha do arquivo de dados na última leitura/gravação
+        self.ids_diario = set()  # IDs com alterações no diário ainda não gravadas no arquivo
+        self.conflitos = {}  # Alterações externas em conflito com o diário (ID -> transação ou None)
+        self.dialogo_conflito = None  # Diálogo de conflito aberto, se houver
+        self.monitor = MonitorArquivo(conta.arquivo_dados)  # Detecta alterações externas no arquivo
+        self.carregar_dados()  # Carrega dados do arquivo CSV
+        self.carregar_recorrencias()  # Carrega as regras recorrentes
+        self.gastos_pendentes.clear()  # Gastos já existentes não geram alertas de orçamento
+        self.previsor = PrevisorFluxoCaixa(self.agregados)  # Projeções de fluxo de caixa com cache
+        self.previsor.definir_metodo(metodo_previsao)
 
     def setup_page(self):
         """Configura as propriedades básicas da página"""
@@ -70,9 +852,10 @@ class ControleFinanceiro:
         self.page.bgcolor = BACKGROUND_COLOR  # Cor de fundo
         self.page.padding = 20  # Espaçamento interno
         self.page.scroll = ft.ScrollMode.AUTO  # Habilita scroll automático
+        self.page.on_keyboard_event = self.tratar_teclado  # Atalhos de desfazer/refazer
 
-    def mostrar_mensagem(self, mensagem, tipo="sucesso"):
-        """Exibe uma mensagem na tela (snackbar)"""
+    def mostrar_mensagem(self, mensagem, tipo="sucesso", acao=None, ao_agir=None):
+        """Exibe uma mensagem na tela (snackbar), opcionalmente com um botão de ação"""
         # Define as cores com base no tipo de mensagem
         cores = {
             "sucesso": SUCCESS_COLOR,
@@ -80,56 +863,301 @@ class ControleFinanceiro:
             "aviso": WARNING_COLOR,
             "investimento": INVESTMENT_COLOR
         }
-        # Cria e exibe a mensagem
-        self.page.snack_bar = ft.SnackBar(
-            content=ft.Text(mensagem, color="white"),
-            bgcolor=cores[tipo],
-            behavior=ft.SnackBarBehavior.FLOATING
-        )
-        self.page.snack_bar.open = True
-        self.page.update()
+        # Cria e exibe a mensagem (sob a trava, para não alterar a página durante uma montagem)
+        with self.trava_dados:
+            self.page.snack_bar = ft.SnackBar(
+                content=ft.Text(mensagem, color="white"),
+                bgcolor=cores[tipo],
+                behavior=ft.SnackBarBehavior.FLOATING,
+                action=acao,
+                on_action=ao_agir
+            )
+            self.page.snack_bar.open = True
+            self.atualizar_pagina()
+
+    async def avisar(self, *args, **kwargs):
+        """Versão de mostrar_mensagem para tratadores assíncronos: espera a trava fora do laço de eventos"""
+        await self.em_segundo_plano(partial(self.mostrar_mensagem, *args, **kwargs))
 
     def carregar_dados(self):
         """Carrega as transações salvas no arquivo CSV"""
         try:
-            if os.path.exists("financas.csv"):
-                with open("financas.csv", mode='r', newline='', encoding='utf-8') as file:
-                    reader = csv.DictReader(file)
-                    for row in reader:
-                        # Cria uma nova transação para cada linha do CSV
-                        transacao = Transacao(
-                            row['descricao'],
-                            row['valor'],
-                            row['data'],
-                            row['tipo'],
-                            row.get('categoria', 'Outros')
-                        )
-                        if 'id' in row:
-                            transacao.id = float(row['id'])
-                        self.transacoes.append(transacao)
+            self.transacoes = self.conta_ativa.ler_transacoes(self.diario, self.base_arquivo, self.ids_diario)
+            for transacao in self.transacoes.values():
+                self.agregados.adicionar(transacao)
+                self.indice_pesquisa.adicionar(transacao.id, transacao.descricao)
         except Exception as e:
             self.mostrar_mensagem(f"Erro ao carregar dados: {str(e)}", "erro")
 
-    def salvar_dados(self):
-        """Salva as transações no arquivo CSV"""
-        try:
-            with open("financas.csv", mode='w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=['id', 'descricao', 'valor', 'data', 'tipo', 'categoria'])
-                writer.writeheader()  # Escreve o cabeçalho
-                for transacao in self.transacoes:
-                    # Escreve cada transação como uma linha no CSV
-                    writer.writerow({
-                        'id': transacao.id,
-                        'descricao': transacao.descricao,
-                        'valor': transacao.valor,
-                        'data': transacao.data,
-                        'tipo': transacao.tipo,
-                        'categoria': transacao.categoria
-                    })
-        except Exception as e:
-            self.mostrar_mensagem(f"Erro ao salvar dados: {str(e)}", "erro")
+    def salvar_dados(self, forcar=False):
+        """Salva as transações no arquivo CSV.
+
+        Antes de gravar, incorpora as alterações externas no arquivo; se houver
+        conflito com o diário, a gravação fica suspensa até o usuário decidir.
+        """
+        with self.trava_dados:
+            if not forcar:
+                self.sincronizar_arquivo()
+                if self.conflitos:
+                    self.mostrar_conflito()  # A gravação aguarda a decisão do usuário
+                    return
+            try:
+                with open(self.conta_ativa.arquivo_dados, mode='w', newline='', encoding='utf-8') as file:
+                    writer = csv.DictWriter(file, fieldnames=CAMPOS_CSV)
+                    writer.writeheader()  # Escreve o cabeçalho
+                    for transacao in self.transacoes.values():
+                        # Escreve cada transação como uma linha no CSV
+                        writer.writerow(transacao.para_dict())
+                self.diario.limpar()  # As alterações do diário agora estão no arquivo
+                self.monitor.registrar()
+                self.base_arquivo = {t.id: t.assinatura() for t in self.transacoes.values()}
+                self.ids_diario.clear()
+            except Exception as e:
+                self.mostrar_mensagem(f"Erro ao salvar dados: {str(e)}", "erro")
+
+    def aplicar_delta(self, transacao_id, antes, depois, registrar=True):
+        """Aplica uma inclusão, exclusão ou edição na memória, nos agregados e no diário.
+
+        Cada chamada custa O(1): o diário recebe uma única linha e o arquivo de dados
+        só é regravado quando o diário atinge LIMITE_DIARIO entradas. Com
+        registrar=False (alterações vindas do próprio arquivo) o diário não é usado.
 
-    def adicionar_transacao(self, e):
+        O estado anterior é lido da transação em memória, sob a trava, e não do
+        argumento antes (que só indica se é uma inclusão). Retorna o Comando
+        efetivamente aplicado, ou None se a alteração falhou.
+        """
+        with self.trava_dados:
+            try:
+                if antes is None:
+                    if transacao_id in self.transacoes:
+                        raise ValueError("a transação já existe")
+                    transacao = Transacao.de_dict({**depois, 'id': transacao_id})
+                    self.transacoes[transacao_id] = transacao
+                    self.agregados.adicionar(transacao)
+                    self.indice_pesquisa.adicionar(transacao_id, transacao.descricao)
+                    if registrar:
+                        self.diario.registrar("adicionar", transacao.para_dict())
+                elif depois is None:
+                    transacao = self.transacoes[transacao_id]
+                    antes = transacao.para_dict()
+                    del self.transacoes[transacao_id]
+                    self.agregados.remover(transacao)
+                    self.indice_pesquisa.remover(transacao_id)
+                    if registrar:
+                        self.diario.registrar("excluir", {'id': transacao_id})
+                else:
+                    transacao = self.transacoes[transacao_id]
+                    antes = {campo: getattr(transacao, campo) for campo in depois}
+                    self.agregados.remover(transacao)
+                    transacao.atualizar(depois)
+                    self.agregados.adicionar(transacao)
+                    if 'descricao' in depois:
+                        # Reindexa apenas se a descrição mudou
+                        self.indice_pesquisa.remover(transacao_id)
+                        self.indice_pesquisa.adicionar(transacao_id, transacao.descricao)
+                    if registrar:
+                        self.diario.registrar("editar", {'id': transacao_id, **depois})
+            except KeyError:
+                self.mostrar_mensagem("Transação não encontrada: ela pode ter sido removida por outro programa.",
+                                      "aviso")
+                return None
+            except Exception as e:
+                self.mostrar_mensagem(f"Erro ao aplicar a alteração: {str(e)}", "erro")
+                return None
+
+            self.resumo_pendente = True
+            if registrar:
+                self.ids_diario.add(transacao_id)
+                if self.diario.entradas >= LIMITE_DIARIO:
+                    self.salvar_dados()  # Consolida o diário no arquivo de dados
+            return Comando(transacao_id, antes, depois)
+
+    def monitorar_arquivo(self):
+        """Laço da thread de monitoramento do arquivo de dados"""
+        while True:
+            time.sleep(INTERVALO_MONITORAMENTO)
+            try:
+                if self.sincronizar_arquivo():
+                    self.atualizar_interface()
+                if self.conflitos:
+                    # Também cobre conflitos detectados por salvar_dados em outra thread
+                    self.mostrar_conflito()
+            except Exception as e:
+                self.mostrar_mensagem(f"Erro ao verificar o arquivo de dados: {str(e)}", "erro")
+
+    def sincronizar_arquivo(self):
+        """Aplica na memória as alterações feitas por outros programas no arquivo de dados.
+
+        Se o arquivo só recebeu linhas novas, lê apenas o trecho acrescentado; caso
+        contrário, compara as linhas pelo ID com as assinaturas da última leitura.
+        Alterações em IDs que também estão no diário viram conflitos. Retorna True
+        se algo mudou.
+        """
+        with self.trava_dados:
+            situacao = self.monitor.verificar()
+            if situacao is None:
+                return False
+
+            if situacao == "anexado":
+                linhas, estado = self.monitor.ler_anexadas()
+                lidos = None
+            else:
+                linhas, estado = self.monitor.ler_todas()
+                lidos = set()
+
+            # Interpreta todas as linhas antes de alterar qualquer estado; linhas inválidas são
+            # ignoradas e a versão em memória dessas transações é mantida
+            validas = []
+            invalidas = 0
+            for row in linhas:
+                try:
+                    transacao = Transacao.de_dict(row)
+                    datetime.strptime(transacao.data, "%d/%m/%Y")
+                    if transacao.tipo not in CATEGORIAS:
+                        raise ValueError(f"tipo inválido: {transacao.tipo}")
+                    validas.append(transacao)
+                except (ValueError, TypeError, KeyError, AttributeError):
+                    invalidas += 1
+                    if lidos is not None:
+                        try:
+                            lidos.add(float(row.get('id')))
+                        except (ValueError, TypeError):
+                            lidos = None  # Sem o ID não dá para saber o que foi removido
+
+            externas = {}  # ID -> transação como está no arquivo (None se foi removida)
+            for transacao in validas:
+                if lidos is not None:
+                    lidos.add(transacao.id)
+                if self.base_arquivo.get(transacao.id) != transacao.assinatura():
+                    externas[transacao.id] = transacao
+            if lidos is not None:
+                # Na leitura completa, IDs que sumiram do arquivo foram removidos
+                for transacao_id in self.base_arquivo:
+                    if transacao_id not in lidos:
+                        externas[transacao_id] = None
+
+            # Leitura concluída: só agora a base e o estado do monitor avançam
+            for transacao_id, transacao in externas.items():
+                if transacao is None:
+                    del self.base_arquivo[transacao_id]
+                else:
+                    self.base_arquivo[transacao_id] = transacao.assinatura()
+            self.monitor.confirmar(estado)
+            if invalidas:
+                self.mostrar_mensagem(f"{invalidas} linha(s) inválida(s) em {self.conta_ativa.arquivo_dados} "
+                                      "foram ignoradas.", "aviso")
+
+            for transacao_id, transacao in externas.items():
+                if transacao_id in self.ids_diario:
+                    self.conflitos[transacao_id] = transacao
+                else:
+                    self.aplicar_externa(transacao_id, transacao)
+            return bool(externas)
+
+    def aplicar_externa(self, transacao_id, transacao):
+        """Aplica na memória a versão de uma transação lida do arquivo (None = removida)"""
+        atual = self.transacoes.get(transacao_id)
+        if transacao is None:
+            if atual is not None:
+                self.aplicar_delta(transacao_id, atual.para_dict(), None, registrar=False)
+        elif atual is None:
+            self.aplicar_delta(transacao_id, None, transacao.para_dict(), registrar=False)
+        else:
+            depois = {campo: valor for campo, valor in transacao.para_dict().items()
+                      if getattr(atual, campo) != valor}
+            if depois:
+                antes = {campo: getattr(atual, campo) for campo in depois}
+                self.aplicar_delta(transacao_id, antes, depois, registrar=False)
+
+    def mostrar_conflito(self):
+        """Pergunta ao usuário qual versão manter quando o arquivo e o app alteraram as mesmas transações"""
+        if self.dialogo_conflito is not None and self.dialogo_conflito.open:
+            return  # A pergunta já está na tela
+        self.dialogo_conflito = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Conflito no arquivo de dados"),
+            content=ft.Text(
+                f"{len(self.conflitos)} transação(ões) alterada(s) neste app também foram "
+                f"alteradas por outro programa em {self.conta_ativa.arquivo_dados}. "
+                "Qual versão deve ser mantida?"
+            ),
+            actions=[
+                ft.TextButton("Manter as minhas", on_click=lambda e: self.resolver_conflito(False)),
+                ft.TextButton("Usar as do arquivo", on_click=lambda e: self.resolver_conflito(True)),
+            ]
+        )
+        with self.trava_dados:
+            self.page.dialog = self.dialogo_conflito
+            self.dialogo_conflito.open = True
+            self.atualizar_pagina()
+
+    def resolver_conflito(self, usar_arquivo):
+        """Aplica a decisão do usuário e grava o arquivo de dados com o resultado"""
+        with self.trava_dados:
+            if usar_arquivo:
+                for transacao_id, transacao in self.conflitos.items():
+                    self.aplicar_externa(transacao_id, transacao)
+            self.conflitos.clear()
+            self.salvar_dados(forcar=True)
+        self.dialogo_conflito.open = False
+        self.atualizar_interface()
+        self.mostrar_mensagem("Conflito resolvido!")
+
+    async def em_segundo_plano(self, funcao, *args):
+        """Executa uma função bloqueante (E/S ou cálculo pesado) no executor, sem travar os eventos"""
+        return await asyncio.get_running_loop().run_in_executor(None, partial(funcao, *args))
+
+    def executar_comando(self, transacao_id, antes, depois):
+        """Aplica uma alteração e, se ela deu certo, a registra no histórico de desfazer"""
+        comando = self.aplicar_delta(transacao_id, antes, depois)
+        if comando is not None:
+            self.historico.registrar(comando)
+        return comando is not None
+
+    async def desfazer(self, e=None):
+        """Desfaz o último comando aplicando o delta inverso"""
+        async with self.trava_alteracoes:
+            comando = self.historico.desfazer()
+            if comando is None:
+                await self.avisar("Nada para desfazer.", "aviso")
+                return
+            aplicado, alerta = await self.em_segundo_plano(self.alterar_com_alertas, self.aplicar_delta, *comando)
+            if aplicado is None:
+                self.historico.descartar(desfeito=True)  # O comando não vale mais para o estado atual
+                return
+        await self.atualizar_interface_async()
+        if alerta:
+            await self.avisar(alerta, "aviso")
+        else:
+            await self.avisar("Alteração desfeita!")
+
+    async def refazer(self, e=None):
+        """Refaz o último comando desfeito"""
+        async with self.trava_alteracoes:
+            comando = self.historico.refazer()
+            if comando is None:
+                await self.avisar("Nada para refazer.", "aviso")
+                return
+            aplicado, alerta = await self.em_segundo_plano(self.alterar_com_alertas, self.aplicar_delta, *comando)
+            if aplicado is None:
+                self.historico.descartar(desfeito=False)
+                return
+        await self.atualizar_interface_async()
+        if alerta:
+            await self.avisar(alerta, "aviso")
+        else:
+            await self.avisar("Alteração refeita!")
+
+    async def tratar_teclado(self, e):
+        """Atalhos de teclado: Ctrl+Z desfaz, Ctrl+Y ou Ctrl+Shift+Z refaz"""
+        if not e.ctrl:
+            return
+        if e.key == "Y" or (e.key == "Z" and e.shift):
+            await self.refazer()
+        elif e.key == "Z":
+            await self.desfazer()
+
+    async def adicionar_transacao(self, e):
         """Adiciona uma nova transação com base nos dados do formulário"""
         # Obtém os valores dos campos de entrada
         descricao = self.input_descricao.value.strip()
@@ -140,51 +1168,488 @@ class ControleFinanceiro:
 
         # Validação dos campos obrigatórios
         if not descricao or not valor:
-            self.mostrar_mensagem("Preencha todos os campos obrigatórios!", "aviso")
+            await self.avisar("Preencha todos os campos obrigatórios!", "aviso")
             return
 
         try:
             valor_float = float(valor)
             if valor_float <= 0:
-                self.mostrar_mensagem("O valor deve ser positivo!", "aviso")
+                await self.avisar("O valor deve ser positivo!", "aviso")
                 return
 
             # Valida o formato da data
             datetime.strptime(data, "%d/%m/%Y")
 
-            # Cria e adiciona a nova transação
-            nova_transacao = Transacao(descricao, valor_float, data, tipo, categoria)
-            self.transacoes.append(nova_transacao)
-            self.salvar_dados()  # Salva os dados no arquivo
+            repeticao = self.select_repeticao.value
+            regra = None
+            if repeticao != "nenhuma":
+                # Cria uma regra recorrente em vez de uma transação avulsa
+                fim = self.input_fim_recorrencia.value.strip()
+                regra = RegraRecorrente(descricao, valor_float, tipo, categoria, repeticao, data, fim)
+                if fim and regra._data_fim < regra._data_inicio:
+                    await self.avisar("A data final deve ser posterior à inicial!", "aviso")
+                    return
             
-            # Limpa os campos de entrada
+            # Limpa os campos de entrada (os valores já foram lidos)
             self.input_descricao.value = ""
             self.input_valor.value = ""
-            self.atualizar_interface()  # Atualiza a interface
+            
+            # Cria e adiciona a nova transação, na ordem em que os cliques chegaram
+            async with self.trava_alteracoes:
+                if regra is not None:
+                    _, alerta = await self.em_segundo_plano(self.alterar_com_alertas, self.adicionar_regra, regra)
+                else:
+                    nova_transacao = Transacao(descricao, valor_float, data, tipo, categoria)
+                    # Inclui a transação pelo histórico de comandos (permite desfazer)
+                    _, alerta = await self.em_segundo_plano(self.alterar_com_alertas, self.executar_comando,
+                                                            nova_transacao.id, None, nova_transacao.para_dict())
+            await self.atualizar_interface_async()  # Atualiza a interface
             
             # Mostra mensagem de sucesso com a cor correspondente ao tipo
             tipo_mensagem = "sucesso" if tipo == "receita" else "erro" if tipo == "despesa" else "investimento"
-            self.mostrar_mensagem(f"Transação ({tipo}) adicionada com sucesso!", tipo_mensagem)
+            if alerta:
+                await self.avisar(alerta, "aviso")
+            elif regra is not None:
+                await self.avisar(f"Recorrência ({tipo}) adicionada com sucesso!", tipo_mensagem)
+            else:
+                await self.avisar(f"Transação ({tipo}) adicionada com sucesso!", tipo_mensagem)
             
         except ValueError as ve:
             if "time data" in str(ve):
-                self.mostrar_mensagem("Formato de data inválido! Use dd/mm/aaaa", "aviso")
+                await self.avisar("Formato de data inválido! Use dd/mm/aaaa", "aviso")
             else:
-                self.mostrar_mensagem("Valor inválido! Use números.", "aviso")
+                await self.avisar("Valor inválido! Use números.", "aviso")
         except Exception as ex:
-            self.mostrar_mensagem(f"Erro: {str(ex)}", "erro")
+            await self.avisar(f"Erro: {str(ex)}", "erro")
 
-    def excluir_transacao(self, transacao_id):
-        """Remove uma transação com base no ID"""
-        self.transacoes = [t for t in self.transacoes if t.id != transacao_id]
-        self.salvar_dados()
+    def carregar_orcamentos(self):
+        """Carrega os orçamentos mensais salvos no arquivo CSV"""
+        try:
+            if os.path.exists(ARQUIVO_ORCAMENTOS):
+                with open(ARQUIVO_ORCAMENTOS, mode='r', newline='', encoding='utf-8') as file:
+                    for row in csv.DictReader(file):
+                        self.orcamentos[row['categoria']] = float(row['limite'])
+        except Exception as e:
+            self.mostrar_mensagem(f"Erro ao carregar orçamentos: {str(e)}", "erro")
+
+    def salvar_orcamentos(self):
+        """Salva os orçamentos mensais no arquivo CSV"""
+        try:
+            with open(ARQUIVO_ORCAMENTOS, mode='w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=['categoria', 'limite'])
+                writer.writeheader()
+                for categoria, limite in self.orcamentos.items():
+                    writer.writerow({'categoria': categoria, 'limite': limite})
+        except Exception as e:
+            self.mostrar_mensagem(f"Erro ao salvar orçamentos: {str(e)}", "erro")
+
+    def definir_orcamento(self, e):
+        """Define (ou remove, com valor vazio ou zero) o orçamento mensal da categoria selecionada"""
+        categoria = self.select_orcamento_categoria.value
+        valor = self.input_orcamento_valor.value.replace(",", ".").strip()
+        try:
+            limite = float(valor) if valor else 0.0
+        except ValueError:
+            self.mostrar_mensagem("Valor inválido! Use números.", "aviso")
+            return
+
+        if limite > 0:
+            self.orcamentos[categoria] = limite
+            mensagem = f"Orçamento de {categoria} definido com sucesso!"
+        else:
+            self.orcamentos.pop(categoria, None)
+            mensagem = f"Orçamento de {categoria} removido!"
+        self.salvar_orcamentos()
+        self.input_orcamento_valor.value = ""
         self.atualizar_interface()
-        self.mostrar_mensagem("Transação excluída com sucesso!")
+        self.mostrar_mensagem(mensagem)
+
+    def registrar_gasto(self, tipo, categoria, mes_ano, anterior):
+        """Ouvinte dos agregados: guarda o gasto de cada despesa antes da primeira alteração não verificada"""
+        if tipo == "despesa":
+            self.gastos_pendentes.setdefault((categoria, mes_ano), anterior)
+
+    def coletar_alertas_orcamento(self):
+        """Verifica os gastos alterados desde a última coleta e retorna um alerta de orçamento (ou None)"""
+        with self.trava_dados:
+            pendentes, self.gastos_pendentes = self.gastos_pendentes, {}
+            alertas = []
+            for (categoria, mes_ano), anterior in pendentes.items():
+                alerta = self.verificar_orcamento("despesa", categoria, mes_ano, anterior)
+                if alerta:
+                    alertas.append(alerta)
+        if not alertas:
+            return None
+        if len(alertas) == 1:
+            return alertas[0]
+        return f"{alertas[-1]} (e mais {len(alertas) - 1} alerta(s) de orçamento)"
+
+    def alterar_com_alertas(self, funcao, *args):
+        """Executa uma alteração sob a trava de dados e retorna (resultado, alerta de orçamento gerado)"""
+        with self.trava_dados:
+            return funcao(*args), self.coletar_alertas_orcamento()
+
+    def verificar_orcamento(self, tipo, categoria, mes_ano, gasto_anterior):
+        """Retorna um alerta se o gasto da categoria no mês cruzou algum limite do orçamento"""
+        limite = self.orcamentos.get(categoria)
+        if tipo != "despesa" or not limite:
+            return None
+        gasto_atual = self.agregados.valor_categoria(tipo, categoria, mes_ano)
+        # Considera apenas o maior limite cruzado por esta transação
+        cruzados = [f for f in LIMITES_ALERTA_ORCAMENTO if gasto_anterior < limite * f <= gasto_atual]
+        if not cruzados:
+            return None
+        percentual = gasto_atual / limite * 100
+        if cruzados[-1] >= 1.0:
+            return f"Orçamento de {categoria} estourado em {mes_ano}: {percentual:.0f}% utilizado!"
+        return f"Atenção: {percentual:.0f}% do orçamento de {categoria} utilizado em {mes_ano}."
+
+    def alterar_zoom_graficos(self, e):
+        """Aplica o intervalo escolhido no slider e busca mais detalhes para ele"""
+        inicio, fim = round(self.slider_zoom.start_value), round(self.slider_zoom.end_value)
+        if inicio <= self.slider_zoom.min and fim >= self.slider_zoom.max:
+            self.zoom_graficos = None
+        else:
+            self.zoom_graficos = (inicio, fim)
+        with self.trava_dados:
+            self.atualizar_graficos()
+            self.atualizar_pagina()
+
+    def atualizar_graficos(self):
+        """Monta os gráficos a partir dos agregados, reduzindo a série à largura do gráfico"""
+        serie = sorted((indice_mes(mes_ano), lucro) for mes_ano, lucro in self.agregados.lucro_mensal.items())
+        if not serie:
+            self.grafico_lucro.data_series = []
+            self.grafico_categorias.bar_groups = []
+            self.slider_zoom.disabled = True
+            self.texto_zoom.value = "Sem dados para exibir."
+            return
+
+        # Ajusta o slider ao período completo disponível
+        primeiro, ultimo = serie[0][0], serie[-1][0]
+        self.slider_zoom.disabled = primeiro == ultimo
+        self.slider_zoom.min, self.slider_zoom.max = primeiro, max(ultimo, primeiro + 1)
+        self.slider_zoom.divisions = max(ultimo - primeiro, 1)
+        inicio, fim = self.zoom_graficos or (primeiro, ultimo)
+        inicio, fim = max(inicio, primeiro), min(fim, ultimo)
+        self.slider_zoom.start_value, self.slider_zoom.end_value = inicio, max(fim, inicio)
+        self.texto_zoom.value = f"{rotulo_mes(inicio)} a {rotulo_mes(fim)}"
+
+        # Apenas o trecho visível é reduzido: com zoom, sobram mais pontos por mês
+        visiveis = [ponto for ponto in serie if inicio <= ponto[0] <= fim]
+        pontos = reduzir_serie(visiveis, LARGURA_GRAFICO // PIXELS_POR_PONTO)
+        self.grafico_lucro.data_series = [
+            ft.LineChartData(
+                data_points=[
+                    ft.LineChartDataPoint(x, y, tooltip=f"{rotulo_mes(x)}: R$ {y:.2f}")
+                    for x, y in pontos
+                ],
+                color=PRIMARY_COLOR,
+                stroke_width=2,
+                curved=False
+            )
+        ]
+        self.grafico_lucro.min_x, self.grafico_lucro.max_x = inicio, max(fim, inicio + 1)
+        # Rótulos do eixo X espaçados para caber na largura do gráfico
+        passo = max((fim - inicio) // 5, 1)
+        self.grafico_lucro.bottom_axis.labels = [
+            ft.ChartAxisLabel(value=x, label=ft.Text(rotulo_mes(x), size=10, color=TEXT_COLOR))
+            for x in range(inicio, fim + 1, passo)
+        ]
+
+        # Gastos por categoria de despesa no mesmo intervalo
+        gastos = []
+        for categoria in CATEGORIAS["despesa"]:
+            por_mes = self.agregados.gastos_categoria.get(("despesa", categoria), {})
+            total = sum(valor for mes_ano, valor in por_mes.items() if inicio <= indice_mes(mes_ano) <= fim)
+            gastos.append((categoria, total))
+        self.grafico_categorias.bar_groups = [
+            ft.BarChartGroup(
+                x=i,
+                bar_rods=[ft.BarChartRod(from_y=0, to_y=total, width=24, color=ERROR_COLOR,
+                                         tooltip=f"{categoria}: R$ {total:.2f}", border_radius=4)]
+            ) for i, (categoria, total) in enumerate(gastos)
+        ]
+        self.grafico_categorias.bottom_axis.labels = [
+            ft.ChartAxisLabel(value=i, label=ft.Text(categoria[:6], size=10, color=TEXT_COLOR))
+            for i, (categoria, _) in enumerate(gastos)
+        ]
+
+    def salvar_resumo_conta(self):
+        """Grava o resumo da conta ativa se houve alterações desde a última gravação"""
+        if not self.resumo_pendente:
+            return
+        try:
+            self.materializar_recorrencias()  # O resumo considera as recorrências até hoje
+            self.conta_ativa.salvar_resumo(self.agregados)
+            self.resumo_pendente = False
+        except Exception as e:
+            self.mostrar_mensagem(f"Erro ao salvar resumo da conta: {str(e)}", "erro")
+
+    async def trocar_conta(self, e):
+        """Ativa outra conta, descartando da memória as transações da conta anterior"""
+        conta = next((c for c in self.contas if c.nome == self.select_conta.value), None)
+        async with self.trava_alteracoes:
+            if conta is None or conta is self.conta_ativa:
+                return
+            await self.em_segundo_plano(self.ativar_conta, conta)
+        self.zoom_graficos = None
+        await self.atualizar_interface_async()
+        await self.avisar(f"Conta {conta.nome} ativada!")
+
+    def ativar_conta(self, conta):
+        """Grava o resumo da conta atual e carrega a conta informada"""
+        with self.trava_dados:
+            self.salvar_resumo_conta()
+            self.resumos_contas.pop(self.conta_ativa.nome, None)  # Será lido do arquivo recém-gravado
+            self.resumos_contas.pop(conta.nome, None)  # A conta ativa usa os agregados em memória
+            self.preparar_conta(conta)
+
+    async def criar_conta(self, e):
+        """Cadastra uma nova conta e a ativa"""
+        nome = self.input_nova_conta.value.strip()
+        if not nome:
+            await self.avisar("Informe o nome da conta!", "aviso")
+            return
+        if any(c.nome.lower() == nome.lower() for c in self.contas):
+            await self.avisar("Já existe uma conta com esse nome!", "aviso")
+            return
+        try:
+            self.contas.append(Conta.nova(nome, self.contas))
+            await self.em_segundo_plano(Conta.salvar_todas, self.contas)
+        except Exception as ex:
+            await self.avisar(f"Erro ao criar conta: {str(ex)}", "erro")
+            return
+        self.input_nova_conta.value = ""
+        self.select_conta.options = [ft.dropdown.Option(c.nome) for c in self.contas]
+        self.select_conta.value = nome
+        await self.trocar_conta(e)
+
+    def atualizar_consolidado(self):
+        """Monta a visão consolidada somando os agregados de cada conta.
+
+        A conta ativa usa os agregados em memória; as demais usam o resumo salvo,
+        sem carregar suas transações.
+        """
+        ano_atual = datetime.now().strftime("%Y")
+        soma = defaultdict(float)
+        linhas = []
+        for conta in self.contas:
+            if conta is self.conta_ativa:
+                totais, lucro_anual = self.agregados.totais, self.agregados.lucro_anual
+            else:
+                if conta.nome not in self.resumos_contas:
+                    try:
+                        self.resumos_contas[conta.nome] = conta.ler_resumo()
+                    except Exception as e:
+                        self.mostrar_mensagem(f"Erro ao ler a conta {conta.nome}: {str(e)}", "erro")
+                        continue
+                resumo = self.resumos_contas[conta.nome]
+                totais, lucro_anual = resumo['totais'], resumo['lucro_anual']
+
+            valores = {
+                'receitas': totais.get('receita', 0.0),
+                'despesas': totais.get('despesa', 0.0),
+                'investimentos': totais.get('investimento', 0.0),
+                'lucro': lucro_anual.get(ano_atual, 0.0)
+            }
+            valores['saldo'] = valores['receitas'] - valores['despesas'] - valores['investimentos']
+            for chave, valor in valores.items():
+                soma[chave] += valor
+            linhas.append((conta.nome, valores))
+        linhas.append(("TOTAL", soma))
+
+        self.tabela_consolidada.rows = [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(nome, color=TEXT_COLOR, weight="bold" if nome == "TOTAL" else None)),
+                ft.DataCell(ft.Text(f"R$ {valores['receitas']:.2f}", color=SUCCESS_COLOR)),
+                ft.DataCell(ft.Text(f"R$ {valores['despesas']:.2f}", color=ERROR_COLOR)),
+                ft.DataCell(ft.Text(f"R$ {valores['investimentos']:.2f}", color=INVESTMENT_COLOR)),
+                ft.DataCell(ft.Text(f"R$ {valores['saldo']:.2f}",
+                                    color=SUCCESS_COLOR if valores['saldo'] >= 0 else ERROR_COLOR)),
+                ft.DataCell(ft.Text(f"R$ {valores['lucro']:.2f}",
+                                    color=SUCCESS_COLOR if valores['lucro'] >= 0 else ERROR_COLOR)),
+            ]) for nome, valores in linhas
+        ]
+        self.tabela_consolidada.columns[5].label.value = f"Lucro {ano_atual}"
+
+    def alterar_metodo_previsao(self, e):
+        """Troca o método de projeção do fluxo de caixa"""
+        self.previsor.definir_metodo(self.select_metodo_previsao.value)
+        self.atualizar_interface()
+
+    async def iniciar_edicao(self, transacao_id, e=None):
+        """Coloca a linha da transação em modo de edição"""
+        self.transacao_em_edicao = transacao_id
+        await self.atualizar_interface_async()
 
-    def aplicar_filtro(self, tipo):
+    async def cancelar_edicao(self, e=None):
+        """Sai do modo de edição sem alterar a transação"""
+        self.transacao_em_edicao = None
+        await self.atualizar_interface_async()
+
+    async def salvar_edicao(self, transacao_id, campos, e=None):
+        """Valida os campos editados e aplica somente os que mudaram"""
+        descricao = campos['descricao'].value.strip()
+        valor = campos['valor'].value.replace(",", ".").strip()
+        data = campos['data'].value.strip()
+        if not descricao or not valor or not data:
+            await self.avisar("Preencha todos os campos obrigatórios!", "aviso")
+            return
+        try:
+            valor_float = float(valor)
+        except ValueError:
+            await self.avisar("Valor inválido! Use números.", "aviso")
+            return
+        if valor_float <= 0:
+            await self.avisar("O valor deve ser positivo!", "aviso")
+            return
+        try:
+            datetime.strptime(data, "%d/%m/%Y")
+        except ValueError:
+            await self.avisar("Formato de data inválido! Use dd/mm/aaaa", "aviso")
+            return
+
+        novos = {
+            'descricao': descricao,
+            'valor': valor_float,
+            'data': data,
+            'tipo': campos['tipo'].value,
+            'categoria': campos['categoria'].value
+        }
+
+        self.transacao_em_edicao = None
+        depois = None
+        alerta = None
+        async with self.trava_alteracoes:
+            transacao = self.transacoes.get(transacao_id)
+            if transacao is not None:
+                # Guarda apenas o delta: os campos alterados e seus novos valores (os antigos
+                # são lidos por aplicar_delta sob a trava de dados)
+                depois = {campo: valor for campo, valor in novos.items() if getattr(transacao, campo) != valor}
+                if depois:
+                    aplicado, alerta = await self.em_segundo_plano(self.alterar_com_alertas, self.executar_comando,
+                                                                   transacao_id, {}, depois)
+                    if not aplicado:
+                        depois = None
+        await self.atualizar_interface_async()
+        if alerta:
+            await self.avisar(alerta, "aviso", acao="Desfazer", ao_agir=self.desfazer)
+        elif depois:
+            await self.avisar("Transação atualizada com sucesso!", acao="Desfazer", ao_agir=self.desfazer)
+
+    async def excluir_transacao(self, transacao_id, e=None):
+        """Remove uma transação com base no ID"""
+        async with self.trava_alteracoes:
+            transacao = self.transacoes.get(transacao_id)
+            if transacao is None:
+                return
+            if not await self.em_segundo_plano(self.executar_comando, transacao_id, transacao.para_dict(), None):
+                return
+        await self.atualizar_interface_async()
+        await self.avisar("Transação excluída com sucesso!", acao="Desfazer", ao_agir=self.desfazer)
+
+    def carregar_recorrencias(self):
+        """Carrega as regras recorrentes salvas no arquivo CSV"""
+        try:
+            self.regras = self.conta_ativa.ler_regras()
+        except Exception as e:
+            self.mostrar_mensagem(f"Erro ao carregar recorrências: {str(e)}", "erro")
+
+    def salvar_recorrencias(self):
+        """Salva as regras recorrentes no arquivo CSV"""
+        try:
+            with open(self.conta_ativa.arquivo_recorrencias, mode='w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=CAMPOS_RECORRENCIAS)
+                writer.writeheader()
+                for regra in self.regras:
+                    writer.writerow({campo: getattr(regra, campo) for campo in CAMPOS_RECORRENCIAS})
+        except Exception as e:
+            self.mostrar_mensagem(f"Erro ao salvar recorrências: {str(e)}", "erro")
+
+    def materializar_recorrencias(self, ate=None):
+        """Gera as ocorrências das regras até a data informada (hoje, por padrão).
+
+        Apenas o trecho entre o horizonte anterior e a nova data é expandido, então
+        chamadas repetidas no mesmo dia não custam nada.
+        """
+        ate = ate or date.today()
+        if self.horizonte_recorrencias is not None and ate <= self.horizonte_recorrencias:
+            return
+        inicial = self.horizonte_recorrencias is None
+        for regra in self.regras:
+            self._incluir_ocorrencias(regra, self.horizonte_recorrencias, ate)
+        if inicial:
+            self.gastos_pendentes.clear()  # Ocorrências passadas, carregadas com a conta, não geram alertas
+        self.horizonte_recorrencias = ate
+        self.resumo_pendente = True
+
+    def _incluir_ocorrencias(self, regra, desde, ate):
+        """Inclui nas ocorrências e nos agregados as datas da regra no intervalo (desde, ate]"""
+        for data in regra.ocorrencias_entre(desde, ate):
+            ocorrencia = regra.criar_ocorrencia(data)
+            self.ocorrencias.append(ocorrencia)
+            self.agregados.adicionar(ocorrencia)
+
+    def adicionar_regra(self, regra):
+        """Adiciona uma regra recorrente e materializa suas ocorrências até o horizonte atual"""
+        with self.trava_dados:
+            self.regras.append(regra)
+            if self.horizonte_recorrencias is not None:
+                self._incluir_ocorrencias(regra, None, self.horizonte_recorrencias)
+            self.resumo_pendente = True
+            self.salvar_recorrencias()
+
+    def remover_regra(self, regra_id):
+        """Remove uma regra recorrente e todas as ocorrências geradas por ela"""
+        with self.trava_dados:
+            self.regras = [r for r in self.regras if r.id != regra_id]
+            for ocorrencia in self.ocorrencias:
+                if ocorrencia.recorrencia == regra_id:
+                    self.agregados.remover(ocorrencia)
+            self.ocorrencias = [o for o in self.ocorrencias if o.recorrencia != regra_id]
+            self.resumo_pendente = True
+            self.salvar_recorrencias()
+
+    def finalizar_regra(self, regra_id, fim):
+        """Encerra a regra na data informada, removendo apenas as ocorrências posteriores"""
+        with self.trava_dados:
+            regra = next((r for r in self.regras if r.id == regra_id), None)
+            if regra is None or not regra.encerrar(fim):
+                return False
+            mantidas = []
+            for ocorrencia in self.ocorrencias:
+                if (ocorrencia.recorrencia == regra_id
+                        and datetime.strptime(ocorrencia.data, "%d/%m/%Y").date() > fim):
+                    self.agregados.remover(ocorrencia)
+                else:
+                    mantidas.append(ocorrencia)
+            self.ocorrencias = mantidas
+            self.resumo_pendente = True
+            self.salvar_recorrencias()
+            return True
+
+    async def encerrar_regra(self, regra_id, e=None):
+        """Encerra a regra recorrente a partir de hoje, preservando as ocorrências passadas"""
+        async with self.trava_alteracoes:
+            encerrada = await self.em_segundo_plano(self.finalizar_regra, regra_id, date.today())
+        if not encerrada:
+            await self.avisar("Esta recorrência já está encerrada.", "aviso")
+            return
+        await self.atualizar_interface_async()
+        await self.avisar("Recorrência encerrada a partir de hoje!")
+
+    async def excluir_regra(self, regra_id, e=None):
+        """Exclui a regra recorrente escolhida na tabela, junto com todo o seu histórico"""
+        async with self.trava_alteracoes:
+            await self.em_segundo_plano(self.remover_regra, regra_id)
+        await self.atualizar_interface_async()
+        await self.avisar("Recorrência e todas as suas ocorrências excluídas!")
+
+    async def aplicar_filtro(self, tipo, e=None):
         """Aplica um filtro para mostrar apenas um tipo específico de transação"""
         self.filtro_ativo = tipo
-        self.atualizar_interface()
+        await self.atualizar_interface_async()
 
     def atualizar_categorias(self, e):
         """Atualiza as categorias disponíveis com base no tipo selecionado"""
@@ -194,18 +1659,98 @@ class ControleFinanceiro:
             ft.dropdown.Option(cat) for cat in CATEGORIAS.get(tipo, ["Outros"])
         ]
         self.select_categoria.value = CATEGORIAS.get(tipo, ["Outros"])[0]
-        self.page.update()
+        self.atualizar_pagina()
 
-    def pesquisar_transacoes(self, e):
+    async def pesquisar_transacoes(self, e):
         """Filtra as transações com base no termo de pesquisa"""
         self.termo_pesquisa = self.input_pesquisa.value.lower().strip()
-        self.atualizar_interface()
+        await self.atualizar_interface_async()  # Digitação rápida: só o termo mais recente é desenhado
+
+    def criar_filtro_visao(self):
+        """Retorna uma função que indica se a transação aparece na visão atual (filtro + pesquisa)"""
+        filtro_ativo = self.filtro_ativo
+        termo = self.termo_pesquisa.lower()
+
+        def filtro(transacao):
+            if filtro_ativo != "todos" and transacao.tipo != filtro_ativo:
+                return False
+            return not termo or termo in transacao.descricao.lower()
+
+        return filtro
+
+    def exportar_relatorio(self, e):
+        """Exporta a visão filtrada ou um relatório por período em segundo plano"""
+        if self.exportando:
+            self.mostrar_mensagem("Já existe uma exportação em andamento.", "aviso")
+            return
+
+        escopo = self.select_exportacao_escopo.value
+        formato = self.select_exportacao_formato.value
+
+        if escopo == "historico":
+            # Copia só as referências das transações (o dicionário pode mudar durante a exportação);
+            # as linhas convertidas continuam sendo geradas bloco a bloco
+            transacoes = list(self.transacoes.values())
+            total = len(transacoes) + len(self.ocorrencias)
+            fonte = chain(transacoes, islice(self.ocorrencias, len(self.ocorrencias)))
+            # O ID vira texto (as ocorrências usam "regra@data") e a regra de origem ganha coluna própria,
+            # mantendo um único tipo por coluna (exigência do Parquet)
+            colunas = CAMPOS_CSV + ['recorrencia']
+            converter = lambda t: (str(t.id), t.descricao, t.valor, t.data, t.tipo, t.categoria,
+                                   "" if t.recorrencia is None else str(t.recorrencia))
+            filtro = self.criar_filtro_visao()
+        else:
+            lucro_mensal, lucro_anual = self.calcular_lucros_por_periodo()
+            if escopo == "mensal":
+                # Ordena cronologicamente pelas chaves mm/aaaa
+                fonte = sorted(lucro_mensal.items(), key=lambda item: (item[0][3:], item[0][:2]))
+                colunas = ["mes_ano", "lucro"]
+            else:
+                fonte = sorted(lucro_anual.items())
+                colunas = ["ano", "lucro"]
+            converter = tuple
+            filtro = None
+            total = None
+
+        self.exportando = True
+        self.btn_exportar.disabled = True
+        self.progresso_exportacao.value = 0
+        self.progresso_exportacao.visible = True
+        self.atualizar_pagina()
+
+        self.exportador.exportar_em_segundo_plano(
+            self.exportacao_concluida, self.exportacao_falhou,
+            f"relatorio_{escopo}", formato, colunas, fonte, converter,
+            filtro=filtro, ao_progredir=self.atualizar_progresso_exportacao, total=total
+        )
+
+    def atualizar_progresso_exportacao(self, fracao):
+        """Atualiza a barra de progresso da exportação (chamado pela thread de exportação)"""
+        self.progresso_exportacao.value = fracao
+        self.atualizar_pagina()
+
+    def finalizar_exportacao(self):
+        """Restaura os controles de exportação ao fim do processo"""
+        self.exportando = False
+        self.btn_exportar.disabled = False
+        self.progresso_exportacao.visible = False
+
+    def exportacao_concluida(self, caminho):
+        """Callback de sucesso da exportação"""
+        self.finalizar_exportacao()
+        self.mostrar_mensagem(f"Relatório exportado para {caminho}")
+
+    def exportacao_falhou(self, erro):
+        """Callback de erro da exportação"""
+        self.finalizar_exportacao()
+        self.mostrar_mensagem(f"Erro ao exportar: {str(erro)}", "erro")
 
     def calcular_totais(self):
         """Calcula os totais de receitas, despesas, investimentos e saldo"""
-        receitas = sum(t.valor for t in self.transacoes if t.tipo == 'receita')
-        despesas = sum(t.valor for t in self.transacoes if t.tipo == 'despesa')
-        investimentos = sum(t.valor for t in self.transacoes if t.tipo == 'investimento')
+        self.materializar_recorrencias()  # Garante que as recorrências até hoje estão nos agregados
+        receitas = self.agregados.totais["receita"]
+        despesas = self.agregados.totais["despesa"]
+        investimentos = self.agregados.totais["investimento"]
         
         # Calcula saldo considerando receitas menos despesas e investimentos
         saldo = receitas - despesas - investimentos
@@ -218,32 +1763,9 @@ class ControleFinanceiro:
         }
 
     def calcular_lucros_por_periodo(self):
-        """Calcula o lucro mensal e anual"""
-        lucro_mensal = defaultdict(float)  # Dicionário para lucro por mês/ano
-        lucro_anual = defaultdict(float)  # Dicionário para lucro por ano
-        
-        for transacao in self.transacoes:
-            try:
-                # Define o sinal do valor (+ para receita, - para despesa/investimento)
-                if transacao.tipo == 'despesa':
-                    sinal = -1
-                elif transacao.tipo == 'investimento':
-                    sinal = -1  # Investimentos reduzem o lucro
-                else:
-                    sinal = 1
-                
-                # Processa a data
-                data = datetime.strptime(transacao.data, "%d/%m/%Y")
-                mes_ano = data.strftime("%m/%Y")
-                ano = data.strftime("%Y")
-                
-                # Acumula os valores
-                lucro_mensal[mes_ano] += transacao.valor * sinal
-                lucro_anual[ano] += transacao.valor * sinal
-            except:
-                continue
-        
-        return lucro_mensal, lucro_anual
+        """Retorna o lucro mensal e anual mantidos pelos agregados"""
+        self.materializar_recorrencias()  # Garante que as recorrências até hoje estão nos agregados
+        return self.agregados.lucro_mensal, self.agregados.lucro_anual
 
     def criar_componentes(self):
         """Cria todos os componentes da interface"""
@@ -295,6 +1817,26 @@ class ControleFinanceiro:
             value=CATEGORIAS["receita"][0]
         )
 
+        # Campos de recorrência
+        self.select_repeticao = ft.Dropdown(
+            label="Repetir", 
+            width=200, 
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR,
+            options=[ft.dropdown.Option("nenhuma", "Não repetir")] + [
+                ft.dropdown.Option(chave, nome) for chave, nome in RegraRecorrente.FREQUENCIAS.items()
+            ],
+            value="nenhuma"
+        )
+
+        self.input_fim_recorrencia = ft.TextField(
+            label="Repetir até (dd/mm/aaaa)", 
+            width=200,
+            hint_text="Opcional",
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR
+        )
+
         # Campo de pesquisa
         self.input_pesquisa = ft.TextField(
             label="Pesquisar transações",
@@ -325,32 +1867,47 @@ class ControleFinanceiro:
         # Botões de filtro
         self.btn_filtro_todos = ft.ElevatedButton(
             "Todos", 
-            on_click=lambda e: self.aplicar_filtro("todos"),
+            on_click=partial(self.aplicar_filtro, "todos"),
             bgcolor=PRIMARY_COLOR if self.filtro_ativo == "todos" else BACKGROUND_COLOR,
             color="white" if self.filtro_ativo == "todos" else PRIMARY_COLOR
         )
 
         self.btn_filtro_receitas = ft.ElevatedButton(
             "Receitas", 
-            on_click=lambda e: self.aplicar_filtro("receita"),
+            on_click=partial(self.aplicar_filtro, "receita"),
             bgcolor=PRIMARY_COLOR if self.filtro_ativo == "receita" else BACKGROUND_COLOR,
             color="white" if self.filtro_ativo == "receita" else SUCCESS_COLOR
         )
 
         self.btn_filtro_despesas = ft.ElevatedButton(
             "Despesas", 
-            on_click=lambda e: self.aplicar_filtro("despesa"),
+            on_click=partial(self.aplicar_filtro, "despesa"),
             bgcolor=PRIMARY_COLOR if self.filtro_ativo == "despesa" else BACKGROUND_COLOR,
             color="white" if self.filtro_ativo == "despesa" else ERROR_COLOR
         )
 
         self.btn_filtro_investimentos = ft.ElevatedButton(
             "Investimentos", 
-            on_click=lambda e: self.aplicar_filtro("investimento"),
+            on_click=partial(self.aplicar_filtro, "investimento"),
             bgcolor=PRIMARY_COLOR if self.filtro_ativo == "investimento" else BACKGROUND_COLOR,
             color="white" if self.filtro_ativo == "investimento" else INVESTMENT_COLOR
         )
 
+        # Botões de desfazer/refazer
+        self.btn_desfazer = ft.IconButton(
+            icon="undo", 
+            icon_color=SECONDARY_COLOR,
+            tooltip="Desfazer (Ctrl+Z)", 
+            on_click=self.desfazer
+        )
+
+        self.btn_refazer = ft.IconButton(
+            icon="redo", 
+            icon_color=SECONDARY_COLOR,
+            tooltip="Refazer (Ctrl+Y)", 
+            on_click=self.refazer
+        )
+
         # Cards de resumo
         card_style = {
             "width": 220, 
@@ -431,6 +1988,160 @@ class ControleFinanceiro:
             border_radius=10
         )
 
+        # Controles de exportação
+        self.select_exportacao_escopo = ft.Dropdown(
+            label="Exportar",
+            width=220,
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR,
+            options=[
+                ft.dropdown.Option("historico", "Histórico filtrado"),
+                ft.dropdown.Option("mensal", "Lucro mensal"),
+                ft.dropdown.Option("anual", "Lucro anual"),
+            ],
+            value="historico"
+        )
+
+        self.select_exportacao_formato = ft.Dropdown(
+            label="Formato",
+            width=140,
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR,
+            options=[ft.dropdown.Option(formato, formato.upper()) for formato in ExportadorRelatorios.FORMATOS],
+            value="csv"
+        )
+
+        self.btn_exportar = ft.ElevatedButton(
+            "Exportar",
+            icon="download",
+            on_click=self.exportar_relatorio,
+            bgcolor=SECONDARY_COLOR,
+            color="white",
+            height=45
+        )
+
+        self.progresso_exportacao = ft.ProgressBar(width=200, color=PRIMARY_COLOR, visible=False)
+
+        # Tabela de previsão do fluxo de caixa
+        self.relatorio_previsao = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("Mês/Ano", weight="bold", color=TEXT_COLOR)),
+                ft.DataColumn(ft.Text("Previsto", weight="bold", color=TEXT_COLOR)),
+            ],
+            border=ft.border.all(1, BORDER_COLOR),
+            border_radius=10
+        )
+
+        self.select_metodo_previsao = ft.Dropdown(
+            width=180,
+            dense=True,
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR,
+            options=[ft.dropdown.Option(chave, nome) for chave, nome in PrevisorFluxoCaixa.METODOS.items()],
+            value=self.previsor.metodo,
+            on_change=self.alterar_metodo_previsao
+        )
+
+        # Seleção e cadastro de contas
+        self.select_conta = ft.Dropdown(
+            label="Conta",
+            width=220,
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR,
+            options=[ft.dropdown.Option(conta.nome) for conta in self.contas],
+            value=self.conta_ativa.nome,
+            on_change=self.trocar_conta
+        )
+
+        self.input_nova_conta = ft.TextField(
+            label="Nova conta",
+            width=220,
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR
+        )
+
+        self.btn_nova_conta = ft.TextButton(
+            "Criar conta",
+            icon="add_card",
+            on_click=self.criar_conta,
+            style=ft.ButtonStyle(color=SECONDARY_COLOR)
+        )
+
+        # Tabela da visão consolidada
+        self.tabela_consolidada = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("Conta", weight="bold", color=TEXT_COLOR)),
+                ft.DataColumn(ft.Text("Receitas", weight="bold", color=TEXT_COLOR)),
+                ft.DataColumn(ft.Text("Despesas", weight="bold", color=TEXT_COLOR)),
+                ft.DataColumn(ft.Text("Investimentos", weight="bold", color=TEXT_COLOR)),
+                ft.DataColumn(ft.Text("Saldo", weight="bold", color=TEXT_COLOR)),
+                ft.DataColumn(ft.Text("Lucro", weight="bold", color=TEXT_COLOR)),
+            ],
+            border=ft.border.all(1, BORDER_COLOR),
+            border_radius=10
+        )
+
+        # Gráficos do lucro mensal e dos gastos por categoria
+        self.grafico_lucro = ft.LineChart(
+            width=LARGURA_GRAFICO,
+            height=250,
+            tooltip_bgcolor=CARD_COLOR,
+            horizontal_grid_lines=ft.ChartGridLines(color=BORDER_COLOR, width=1),
+            left_axis=ft.ChartAxis(labels_size=60),
+            bottom_axis=ft.ChartAxis(labels_size=30)
+        )
+
+        self.grafico_categorias = ft.BarChart(
+            width=LARGURA_GRAFICO,
+            height=250,
+            tooltip_bgcolor=CARD_COLOR,
+            horizontal_grid_lines=ft.ChartGridLines(color=BORDER_COLOR, width=1),
+            left_axis=ft.ChartAxis(labels_size=60),
+            bottom_axis=ft.ChartAxis(labels_size=30)
+        )
+
+        # Seleção do intervalo de meses exibido (zoom)
+        self.slider_zoom = ft.RangeSlider(
+            min=0,
+            max=1,
+            start_value=0,
+            end_value=1,
+            active_color=PRIMARY_COLOR,
+            on_change_end=self.alterar_zoom_graficos,
+            expand=True
+        )
+        self.texto_zoom = ft.Text("", color=TEXT_COLOR)
+
+        # Controles de orçamento
+        self.select_orcamento_categoria = ft.Dropdown(
+            label="Categoria",
+            width=200,
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR,
+            options=[ft.dropdown.Option(cat) for cat in CATEGORIAS["despesa"]],
+            value=CATEGORIAS["despesa"][0]
+        )
+
+        self.input_orcamento_valor = ft.TextField(
+            label="Limite mensal (R$)",
+            prefix_text="R$ ",
+            width=200,
+            keyboard_type=ft.KeyboardType.NUMBER,
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR
+        )
+
+        self.btn_definir_orcamento = ft.ElevatedButton(
+            "Definir",
+            icon="savings",
+            on_click=self.definir_orcamento,
+            bgcolor=PRIMARY_COLOR,
+            color="white",
+            height=45
+        )
+
+        self.lista_orcamentos = ft.Column(spacing=8)
+
     def criar_texto_com_destaque(self, texto, termo_pesquisa):
         """Destaca o termo de pesquisa no texto, se encontrado"""
         if not termo_pesquisa or termo_pesquisa.lower() not in texto.lower():
@@ -466,7 +2177,9 @@ class ControleFinanceiro:
         self.input_descricao.value = ""
         self.input_valor.value = ""
         self.input_data.value = datetime.now().strftime("%d/%m/%Y")
-        self.page.update()
+        self.select_repeticao.value = "nenhuma"
+        self.input_fim_recorrencia.value = ""
+        self.atualizar_pagina()
 
     def criar_botao_excluir(self, transacao_id):
         """Cria um botão de excluir para uma transação"""
@@ -474,93 +2187,239 @@ class ControleFinanceiro:
             icon="delete", 
             icon_color=ERROR_COLOR,
             tooltip="Excluir", 
-            on_click=lambda e: self.excluir_transacao(transacao_id)
+            on_click=partial(self.excluir_transacao, transacao_id)
         )
 
+    def criar_botao_editar(self, transacao_id):
+        """Cria um botão que coloca a linha da transação em modo de edição"""
+        return ft.IconButton(
+            icon="edit", 
+            icon_color=PRIMARY_COLOR,
+            tooltip="Editar", 
+            on_click=partial(self.iniciar_edicao, transacao_id)
+        )
+
+    def criar_linha_edicao(self, transacao):
+        """Cria a linha da tabela com campos editáveis para a transação"""
+        descricao = ft.TextField(value=transacao.descricao, dense=True, border_color=PRIMARY_COLOR, color=TEXT_COLOR)
+        # Duas casas só quando isso não altera o valor: o texto precisa representá-lo exatamente,
+        # senão salvar sem mexer no campo mudaria o valor gravado
+        texto_valor = f"{transacao.valor:.2f}"
+        if float(texto_valor) != transacao.valor:
+            texto_valor = repr(transacao.valor)
+        valor = ft.TextField(value=texto_valor, dense=True, width=110,
+                             border_color=PRIMARY_COLOR, color=TEXT_COLOR)
+        data = ft.TextField(value=transacao.data, dense=True, width=120, border_color=PRIMARY_COLOR, color=TEXT_COLOR)
+        categoria = ft.Dropdown(
+            dense=True,
+            width=150,
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR,
+            options=[ft.dropdown.Option(cat) for cat in CATEGORIAS.get(transacao.tipo, ["Outros"])],
+            value=transacao.categoria
+        )
+
+        def trocar_tipo(e):
+            # Mantém as categorias coerentes com o tipo escolhido
+            categoria.options = [ft.dropdown.Option(cat) for cat in CATEGORIAS.get(tipo.value, ["Outros"])]
+            categoria.value = CATEGORIAS.get(tipo.value, ["Outros"])[0]
+            self.atualizar_pagina()
+
+        tipo = ft.Dropdown(
+            dense=True,
+            width=140,
+            border_color=PRIMARY_COLOR,
+            color=TEXT_COLOR,
+            options=[
+                ft.dropdown.Option("receita", "Receita"),
+                ft.dropdown.Option("despesa", "Despesa"),
+                ft.dropdown.Option("investimento", "Investimento"),
+            ],
+            value=transacao.tipo,
+            on_change=trocar_tipo
+        )
+
+        campos = {'descricao': descricao, 'valor': valor, 'data': data, 'tipo': tipo, 'categoria': categoria}
+        acoes = ft.Row([
+            ft.IconButton(icon="check", icon_color=SUCCESS_COLOR, tooltip="Salvar",
+                          on_click=partial(self.salvar_edicao, transacao.id, campos)),
+            ft.IconButton(icon="close", icon_color=ERROR_COLOR, tooltip="Cancelar",
+                          on_click=self.cancelar_edicao),
+        ], spacing=0)
+        return ft.DataRow(cells=[ft.DataCell(controle) for controle in campos.values()] + [ft.DataCell(acoes)])
+
+    def criar_botoes_recorrencia(self, regra_id):
+        """Cria os botões que encerram ou excluem a regra recorrente que gerou a transação"""
+        return ft.Row([
+            ft.IconButton(
+                icon="event_busy",
+                icon_color=WARNING_COLOR,
+                tooltip="Encerrar recorrência a partir de hoje (mantém o histórico)",
+                on_click=partial(self.encerrar_regra, regra_id)
+            ),
+            ft.IconButton(
+                icon="delete_sweep",
+                icon_color=ERROR_COLOR,
+                tooltip="Excluir recorrência e todas as suas ocorrências, inclusive passadas",
+                on_click=partial(self.excluir_regra, regra_id)
+            )
+        ], spacing=0)
+
+    def atualizar_pagina(self):
+        """Envia a árvore de controles para a tela.
+
+        Usa a mesma trava de montar_interface: o Flet nunca compara a árvore enquanto
+        outra thread a está remontando.
+        """
+        with self.trava_dados:
+            self.page.update()
+
     def atualizar_interface(self):
         """Atualiza toda a interface com os dados mais recentes"""
-        # Calcula totais e lucros
-        totais = self.calcular_totais()
-        lucro_mensal, lucro_anual = self.calcular_lucros_por_periodo()
-        
-        # Atualiza cards com os novos valores
-        self.card_receitas.content.content.controls[1].value = f"R$ {totais['receitas']:.2f}"
-        self.card_despesas.content.content.controls[1].value = f"R$ {totais['despesas']:.2f}"
-        self.card_saldo.content.content.controls[1].value = f"R$ {totais['saldo']:.2f}"
-        # Define a cor do saldo (verde para positivo, vermelho para negativo)
-        self.card_saldo.content.content.controls[1].color = SUCCESS_COLOR if totais['saldo'] >= 0 else ERROR_COLOR
-        self.card_investimentos.content.content.controls[1].value = f"R$ {totais['investimentos']:.2f}"
-        
-        # Filtra as transações conforme o filtro ativo
-        transacoes_filtradas = self.transacoes
-        if self.filtro_ativo != "todos":
-            transacoes_filtradas = [t for t in self.transacoes if t.tipo == self.filtro_ativo]
-        
-        # Aplica a pesquisa, se houver termo
-        if self.termo_pesquisa:
-            transacoes_filtradas = [t for t in transacoes_filtradas 
-                                  if self.termo_pesquisa.lower() in t.descricao.lower()]
-        
-        # Cria as linhas da tabela com as transações filtradas
-        linhas = []
-        for transacao in sorted(transacoes_filtradas, 
-                              key=lambda x: datetime.strptime(x.data, "%d/%m/%Y"), 
-                              reverse=True):
-            # Define a cor com base no tipo de transação
-            cor = {
-                "receita": SUCCESS_COLOR,
-                "despesa": ERROR_COLOR,
-                "investimento": INVESTMENT_COLOR
-            }.get(transacao.tipo, TEXT_COLOR)
+        with self.trava_dados:
+            self.montar_interface()
+            self.atualizar_pagina()
+            # Alterações que não passaram por um tratador (ocorrências do dia, arquivo externo)
+            alerta = self.coletar_alertas_orcamento()
+        if alerta:
+            self.mostrar_mensagem(alerta, "aviso")
+
+    async def atualizar_interface_async(self):
+        """Versão assíncrona de atualizar_interface: monta os controles no executor.
+
+        Pedidos feitos enquanto outro está em andamento são agrupados: apenas o mais
+        recente é montado e enviado para a tela.
+        """
+        self.geracao_interface += 1
+        geracao = self.geracao_interface
+        async with self.trava_interface:
+            if geracao != self.geracao_interface:
+                return  # Um pedido mais recente vai redesenhar a tela
+            # A montagem e o envio acontecem no executor, sob a trava de dados
+            await self.em_segundo_plano(self.atualizar_interface)
+
+    def montar_interface(self):
+        """Recalcula os dados e monta os controles da interface, sem enviá-los para a tela"""
+        with self.trava_dados:
+            # Calcula totais e lucros
+            totais = self.calcular_totais()
+            lucro_mensal, lucro_anual = self.calcular_lucros_por_periodo()
+        
+            # Atualiza cards com os novos valores
+            self.card_receitas.content.content.controls[1].value = f"R$ {totais['receitas']:.2f}"
+            self.card_despesas.content.content.controls[1].value = f"R$ {totais['despesas']:.2f}"
+            self.card_saldo.content.content.controls[1].value = f"R$ {totais['saldo']:.2f}"
+            # Define a cor do saldo (verde para positivo, vermelho para negativo)
+            self.card_saldo.content.content.controls[1].color = SUCCESS_COLOR if totais['saldo'] >= 0 else ERROR_COLOR
+            self.card_investimentos.content.content.controls[1].value = f"R$ {totais['investimentos']:.2f}"
+        
+            # Filtra as transações (incluindo ocorrências recorrentes) conforme o filtro e a pesquisa
+            transacoes_filtradas = chain(self.transacoes.values(), self.ocorrencias)
+            ids_encontrados = self.indice_pesquisa.buscar(self.termo_pesquisa) if self.termo_pesquisa else None
+            if ids_encontrados is not None:
+                # O índice já restringe as transações; as ocorrências recorrentes são poucas e varridas
+                transacoes_filtradas = chain((self.transacoes[i] for i in ids_encontrados), self.ocorrencias)
+            if self.filtro_ativo != "todos" or self.termo_pesquisa:
+                filtro = self.criar_filtro_visao()
+                transacoes_filtradas = [t for t in transacoes_filtradas if filtro(t)]
+        
+            # Cria as linhas da tabela com as transações filtradas
+            linhas = []
+            for transacao in sorted(transacoes_filtradas, 
+                                  key=lambda x: datetime.strptime(x.data, "%d/%m/%Y"), 
+                                  reverse=True):
+                # Define a cor com base no tipo de transação
+                cor = {
+                    "receita": SUCCESS_COLOR,
+                    "despesa": ERROR_COLOR,
+                    "investimento": INVESTMENT_COLOR
+                }.get(transacao.tipo, TEXT_COLOR)
             
-            # Cria uma linha da tabela para cada transação
-            linhas.append(
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(self.criar_texto_com_destaque(transacao.descricao, self.termo_pesquisa)),
-                        ft.DataCell(ft.Text(f"R$ {transacao.valor:.2f}", color=cor)),
-                        ft.DataCell(ft.Text(transacao.data, color=TEXT_COLOR)),
-                        ft.DataCell(ft.Text(transacao.tipo.capitalize(), color=TEXT_COLOR)),
-                        ft.DataCell(ft.Text(transacao.categoria, color=TEXT_COLOR)),
-                        ft.DataCell(self.criar_botao_excluir(transacao.id))
-                    ]
+                if transacao.id == self.transacao_em_edicao:
+                    linhas.append(self.criar_linha_edicao(transacao))
+                    continue
+            
+                # Cria uma linha da tabela para cada transação
+                linhas.append(
+                    ft.DataRow(
+                        cells=[
+                            ft.DataCell(self.criar_texto_com_destaque(transacao.descricao, self.termo_pesquisa)),
+                            ft.DataCell(ft.Text(f"R$ {transacao.valor:.2f}", color=cor)),
+                            ft.DataCell(ft.Text(transacao.data, color=TEXT_COLOR)),
+                            ft.DataCell(ft.Text(transacao.tipo.capitalize(), color=TEXT_COLOR)),
+                            ft.DataCell(ft.Text(transacao.categoria, color=TEXT_COLOR)),
+                            ft.DataCell(self.criar_botoes_recorrencia(transacao.recorrencia)
+                                        if transacao.recorrencia else
+                                        ft.Row([self.criar_botao_editar(transacao.id),
+                                                self.criar_botao_excluir(transacao.id)], spacing=0))
+                        ]
+                    )
                 )
-            )
         
-        self.tabela.rows = linhas
+            self.tabela.rows = linhas
         
-        # Atualiza os relatórios mensais
-        self.relatorio_mensal.rows = [
-            ft.DataRow(cells=[
-                ft.DataCell(ft.Text(mes_ano, color=TEXT_COLOR)),
-                ft.DataCell(ft.Text(f"R$ {lucro:.2f}", 
-                                  color=SUCCESS_COLOR if lucro >= 0 else ERROR_COLOR))
-            ]) for mes_ano, lucro in sorted(lucro_mensal.items(), reverse=True)
-        ]
+            # Atualiza os relatórios mensais
+            self.relatorio_mensal.rows = [
+                ft.DataRow(cells=[
+                    ft.DataCell(ft.Text(mes_ano, color=TEXT_COLOR)),
+                    ft.DataCell(ft.Text(f"R$ {lucro:.2f}", 
+                                      color=SUCCESS_COLOR if lucro >= 0 else ERROR_COLOR))
+                ]) for mes_ano, lucro in sorted(lucro_mensal.items(), reverse=True)
+            ]
         
-        # Atualiza os relatórios anuais
-        self.relatorio_anual.rows = [
-            ft.DataRow(cells=[
-                ft.DataCell(ft.Text(ano, color=TEXT_COLOR)),
-                ft.DataCell(ft.Text(f"R$ {lucro:.2f}", 
-                                  color=SUCCESS_COLOR if lucro >= 0 else ERROR_COLOR))
-            ]) for ano, lucro in sorted(lucro_anual.items(), reverse=True)
-        ]
+            # Atualiza os relatórios anuais
+            self.relatorio_anual.rows = [
+                ft.DataRow(cells=[
+                    ft.DataCell(ft.Text(ano, color=TEXT_COLOR)),
+                    ft.DataCell(ft.Text(f"R$ {lucro:.2f}", 
+                                      color=SUCCESS_COLOR if lucro >= 0 else ERROR_COLOR))
+                ]) for ano, lucro in sorted(lucro_anual.items(), reverse=True)
+            ]
+        
+            # Atualiza a previsão do fluxo de caixa (recalculada apenas se o cache foi invalidado)
+            self.relatorio_previsao.rows = [
+                ft.DataRow(cells=[
+                    ft.DataCell(ft.Text(mes_ano, color=TEXT_COLOR)),
+                    ft.DataCell(ft.Text(f"R$ {lucro:.2f}", 
+                                      color=SUCCESS_COLOR if lucro >= 0 else ERROR_COLOR))
+                ]) for mes_ano, lucro in self.previsor.projetar_lucro()
+            ]
+        
+            # Atualiza o acompanhamento dos orçamentos do mês atual
+            mes_atual = datetime.now().strftime("%m/%Y")
+            linhas_orcamento = []
+            for categoria, limite in sorted(self.orcamentos.items()):
+                gasto = self.agregados.valor_categoria("despesa", categoria, mes_atual)
+                fracao = gasto / limite
+                cor = ERROR_COLOR if fracao >= 1 else WARNING_COLOR if fracao >= LIMITES_ALERTA_ORCAMENTO[0] else SUCCESS_COLOR
+                linhas_orcamento.append(ft.Column([
+                    ft.Text(f"{categoria}: R$ {gasto:.2f} de R$ {limite:.2f} ({fracao * 100:.0f}%)", color=TEXT_COLOR),
+                    ft.ProgressBar(value=min(fracao, 1.0), color=cor, bgcolor=BORDER_COLOR)
+                ], spacing=2))
+            if not linhas_orcamento:
+                linhas_orcamento.append(ft.Text("Nenhum orçamento definido.", color=TEXT_COLOR, italic=True))
+            self.lista_orcamentos.controls = linhas_orcamento
+        
+            # Atualiza os gráficos
+            self.atualizar_graficos()
+        
+            # Grava o resumo da conta ativa (se mudou) e atualiza a visão consolidada
+            self.salvar_resumo_conta()
+            self.atualizar_consolidado()
         
-        # Atualiza a aparência dos botões de filtro
-        self.btn_filtro_todos.bgcolor = PRIMARY_COLOR if self.filtro_ativo == "todos" else BACKGROUND_COLOR
-        self.btn_filtro_todos.color = "white" if self.filtro_ativo == "todos" else PRIMARY_COLOR
+            # Atualiza a aparência dos botões de filtro
+            self.btn_filtro_todos.bgcolor = PRIMARY_COLOR if self.filtro_ativo == "todos" else BACKGROUND_COLOR
+            self.btn_filtro_todos.color = "white" if self.filtro_ativo == "todos" else PRIMARY_COLOR
         
-        self.btn_filtro_receitas.bgcolor = PRIMARY_COLOR if self.filtro_ativo == "receita" else BACKGROUND_COLOR
-        self.btn_filtro_receitas.color = "white" if self.filtro_ativo == "receita" else SUCCESS_COLOR
+            self.btn_filtro_receitas.bgcolor = PRIMARY_COLOR if self.filtro_ativo == "receita" else BACKGROUND_COLOR
+            self.btn_filtro_receitas.color = "white" if self.filtro_ativo == "receita" else SUCCESS_COLOR
         
-        self.btn_filtro_despesas.bgcolor = PRIMARY_COLOR if self.filtro_ativo == "despesa" else BACKGROUND_COLOR
-        self.btn_filtro_despesas.color = "white" if self.filtro_ativo == "despesa" else ERROR_COLOR
+            self.btn_filtro_despesas.bgcolor = PRIMARY_COLOR if self.filtro_ativo == "despesa" else BACKGROUND_COLOR
+            self.btn_filtro_despesas.color = "white" if self.filtro_ativo == "despesa" else ERROR_COLOR
         
-        self.btn_filtro_investimentos.bgcolor = PRIMARY_COLOR if self.filtro_ativo == "investimento" else BACKGROUND_COLOR
-        self.btn_filtro_investimentos.color = "white" if self.filtro_ativo == "investimento" else INVESTMENT_COLOR
+            self.btn_filtro_investimentos.bgcolor = PRIMARY_COLOR if self.filtro_ativo == "investimento" else BACKGROUND_COLOR
+            self.btn_filtro_investimentos.color = "white" if self.filtro_ativo == "investimento" else INVESTMENT_COLOR
         
-        self.page.update()
 
     def montar_layout(self):
         """Monta o layout completo da aplicação"""
@@ -575,6 +2434,13 @@ class ControleFinanceiro:
             spacing=10
         )
         
+        # Linha de seleção de conta
+        contas = ft.Row(
+            [self.select_conta, self.input_nova_conta, self.btn_nova_conta],
+            spacing=10,
+            vertical_alignment=ft.CrossAxisAlignment.CENTER
+        )
+        
         # Card do formulário de nova transação
         form_card = ft.Card(
             content=ft.Container(
@@ -583,6 +2449,7 @@ class ControleFinanceiro:
                     ft.Divider(height=10),
                     ft.Row([self.input_descricao, self.input_valor]),
                     ft.Row([self.input_data, self.select_tipo, self.select_categoria]),
+                    ft.Row([self.select_repeticao, self.input_fim_recorrencia]),
                     ft.Row([self.btn_limpar, self.btn_adicionar], alignment="end")
                 ], spacing=10),
                 padding=20,
@@ -595,10 +2462,19 @@ class ControleFinanceiro:
         # Linha de botões de filtro
         filtros = ft.Row(
             [self.btn_filtro_todos, self.btn_filtro_receitas, 
-             self.btn_filtro_despesas, self.btn_filtro_investimentos],
+             self.btn_filtro_despesas, self.btn_filtro_investimentos,
+             self.btn_desfazer, self.btn_refazer],
             spacing=10
         )
         
+        # Linha de exportação de relatórios
+        exportacao = ft.Row(
+            [self.select_exportacao_escopo, self.select_exportacao_formato,
+             self.btn_exportar, self.progresso_exportacao],
+            spacing=10,
+            vertical_alignment=ft.CrossAxisAlignment.CENTER
+        )
+        
         # Campo de pesquisa
         pesquisa = ft.Row(
             [self.input_pesquisa],
@@ -634,7 +2510,7 @@ class ControleFinanceiro:
             spacing=20
         )
         
-        # Seção de relatórios (mensal e anual)
+        # Seção de relatórios (mensal, previsão e anual)
         relatorios = ft.Row([
             ft.Column([
                 ft.Text("LUCRO MENSAL", size=16, weight="bold", color=TEXT_COLOR),
@@ -647,6 +2523,20 @@ class ControleFinanceiro:
                 )
             ], expand=True),
             
+            ft.Column([
+                ft.Row([
+                    ft.Text("PREVISÃO", size=16, weight="bold", color=TEXT_COLOR),
+                    self.select_metodo_previsao
+                ], alignment="spaceBetween"),
+                ft.Container(
+                    content=ft.ListView([self.relatorio_previsao], height=200),
+                    border=ft.border.all(1, BORDER_COLOR),
+                    border_radius=10,
+                    padding=10,
+                    bgcolor=CARD_COLOR
+                )
+            ], expand=True),
+            
             ft.Column([
                 ft.Text("LUCRO ANUAL", size=16, weight="bold", color=TEXT_COLOR),
                 ft.Container(
@@ -659,11 +2549,67 @@ class ControleFinanceiro:
             ], expand=True)
         ], spacing=20)
         
+        # Seção de gráficos (lucro mensal e gastos por categoria)
+        graficos = ft.Column([
+            ft.Row([
+                ft.Column([
+                    ft.Text("EVOLUÇÃO DO LUCRO", size=16, weight="bold", color=TEXT_COLOR),
+                    ft.Container(
+                        content=self.grafico_lucro,
+                        border=ft.border.all(1, BORDER_COLOR),
+                        border_radius=10,
+                        padding=10,
+                        bgcolor=CARD_COLOR
+                    )
+                ], expand=True),
+                ft.Column([
+                    ft.Text("GASTOS POR CATEGORIA", size=16, weight="bold", color=TEXT_COLOR),
+                    ft.Container(
+                        content=self.grafico_categorias,
+                        border=ft.border.all(1, BORDER_COLOR),
+                        border_radius=10,
+                        padding=10,
+                        bgcolor=CARD_COLOR
+                    )
+                ], expand=True)
+            ], spacing=20),
+            ft.Row([ft.Text("Período:", color=TEXT_COLOR), self.slider_zoom, self.texto_zoom])
+        ], spacing=10)
+        
+        # Visão consolidada de todas as contas
+        consolidado = ft.Column([
+            ft.Text("VISÃO CONSOLIDADA", size=16, weight="bold", color=TEXT_COLOR),
+            ft.Container(
+                content=self.tabela_consolidada,
+                border=ft.border.all(1, BORDER_COLOR),
+                border_radius=10,
+                padding=10,
+                bgcolor=CARD_COLOR
+            )
+        ])
+        
+        # Card de orçamentos mensais
+        orcamentos_card = ft.Card(
+            content=ft.Container(
+                content=ft.Column([
+                    ft.Text("ORÇAMENTOS DO MÊS", size=18, weight="bold", color=TEXT_COLOR),
+                    ft.Divider(height=10),
+                    ft.Row([self.select_orcamento_categoria, self.input_orcamento_valor,
+                            self.btn_definir_orcamento]),
+                    self.lista_orcamentos
+                ], spacing=10),
+                padding=20,
+                bgcolor=CARD_COLOR
+            ),
+            elevation=3
+        )
+        
         # Seção do histórico de transações
         historico = ft.Column([
             ft.Text("HISTÓRICO", size=18, weight="bold", color=TEXT_COLOR),
             pesquisa,
             filtros,
+            exportacao,
             ft.Container(
                 content=ft.ListView([self.tabela], expand=True),
                 border=ft.border.all(1, BORDER_COLOR),
@@ -677,12 +2623,16 @@ class ControleFinanceiro:
         self.page.add(
             ft.Column([
                 header,  # Cabeçalho com logo
+                contas,  # Seleção de conta
                 form_card,  # Formulário de nova transação
                 ft.Container(
                     content=totais,
                     alignment=ft.alignment.center
                 ),  # Cards de resumo
                 relatorios,  # Relatórios
+                graficos,  # Gráficos
+                consolidado,  # Visão consolidada das contas
+                orcamentos_card,  # Orçamentos
                 historico  # Histórico de transações
             ], spacing=25, expand=True)
         )
@@ -1,9 +1,15 @@
 import flet as ft
 import random
 import os
+import re
+import bisect
 from datetime import datetime
 
-DATA_FILE = "scores.txt"
+DATA_FILE = "scores.csv"
+DATA_HEADER = "timestamp,start,end,attempts\n"
+LEGACY_DATA_FILE = "scores.txt"
+LEGACY_PATTERN = re.compile(r"\[(.+?)\] Intervalo: (-?\d+) a (-?\d+) - Acertou em (\d+) tentativas")
+PAGE_SIZE = 20
 
 def main(page: ft.Page):
     page.title = "🎯 Jogo de Adivinhação"
@@ -13,6 +19,7 @@ def main(page: ft.Page):
     page.padding = 20
     page.window_width = 400
     page.window_height = 600
+    page.scroll = "auto"
 
     target_number = None
     attempts = 0
@@ -68,19 +75,108 @@ def main(page: ft.Page):
     result_text = ft.Text("", size=18, color="#ffeaa7", visible=False, weight="bold", text_align="center")
 
     score_list = ft.Column(scroll="auto", height=200)
+    page_label = styled_text("", size=14, color="#b2bec3")
+    newer_button = ft.TextButton("◀ Recentes", on_click=lambda e: change_page(-1))
+    older_button = ft.TextButton("Antigas ▶", on_click=lambda e: change_page(1))
+    leaderboard_list = ft.Column()
+
+    # Byte offset of every record in DATA_FILE (oldest first), so a page is read with a few seeks
+    score_offsets = []
+    current_page = 0  # 0 is the page with the newest scores
+    # Fewest attempts per range size, kept up to date on every insert
+    best_by_range = {}
+    leaderboard_sizes = []
+    leaderboard_texts = {}
+
+    def parse_record(line):
+        timestamp, start, end, attempts = line.decode("utf-8").rstrip("\r\n").split(",")
+        return timestamp, int(start), int(end), int(attempts)
+
+    def format_record(timestamp, start, end, attempts):
+        when = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M:%S")
+        return f"[{when}] Intervalo: {start} a {end} - Acertou em {attempts} tentativas"
+
+    def migrate_legacy_scores():
+        if os.path.exists(DATA_FILE) or not os.path.exists(LEGACY_DATA_FILE):
+            return
+        with open(LEGACY_DATA_FILE, "r", encoding="utf-8") as legacy, \
+                open(DATA_FILE, "w", encoding="utf-8", newline="") as file:
+            file.write(DATA_HEADER)
+            for line in legacy:
+                match = LEGACY_PATTERN.match(line.strip())
+                if match:
+                    when = datetime.strptime(match.group(1), "%d/%m/%Y %H:%M:%S")
+                    file.write(f"{when:%Y-%m-%d %H:%M:%S},{match.group(2)},{match.group(3)},{match.group(4)}\n")
+
+    def update_leaderboard(start, end, attempts):
+        size = end - start + 1
+        if best_by_range.get(size, attempts + 1) <= attempts:
+            return
+        best_by_range[size] = attempts
+        text = f"Intervalo de {size} números: {attempts} tentativas"
+        if size in leaderboard_texts:
+            leaderboard_texts[size].value = text
+            return
+        position = bisect.bisect_left(leaderboard_sizes, size)
+        leaderboard_sizes.insert(position, size)
+        leaderboard_texts[size] = styled_text(text, size=14, color="#dfe6e9")
+        leaderboard_list.controls.insert(position, leaderboard_texts[size])
+
+    def index_scores():
+        migrate_legacy_scores()
+        if not os.path.exists(DATA_FILE):
+            return
+        with open(DATA_FILE, "rb") as file:
+            offset = len(file.readline())
+            for line in file:
+                if line.strip():
+                    score_offsets.append(offset)
+                    update_leaderboard(*parse_record(line)[1:])
+                offset += len(line)
+
+    def page_count():
+        return max(1, (len(score_offsets) + PAGE_SIZE - 1) // PAGE_SIZE)
+
+    def update_pagination():
+        page_label.value = f"Página {current_page + 1} de {page_count()}"
+        newer_button.disabled = current_page == 0
+        older_button.disabled = current_page >= page_count() - 1
 
     def load_scores():
         score_list.controls.clear()
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r", encoding="utf-8") as file:
-                for line in file.readlines():
-                    score_list.controls.append(styled_text(line.strip(), size=14, color="#dfe6e9"))
+        newest = len(score_offsets) - current_page * PAGE_SIZE
+        if newest > 0:
+            with open(DATA_FILE, "rb") as file:
+                for index in range(newest - 1, max(0, newest - PAGE_SIZE) - 1, -1):
+                    file.seek(score_offsets[index])
+                    record = parse_record(file.readline())
+                    score_list.controls.append(styled_text(format_record(*record), size=14, color="#dfe6e9"))
+        update_pagination()
         page.update()
 
+    def change_page(step):
+        nonlocal current_page
+        current_page = min(max(current_page + step, 0), page_count() - 1)
+        load_scores()
+
     def save_score(attempts, start, end):
-        now = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        with open(DATA_FILE, "a", encoding="utf-8") as file:
-            file.write(f"[{now}] Intervalo: {start} a {end} - Acertou em {attempts} tentativas\n")
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        new_file = not os.path.exists(DATA_FILE)
+        with open(DATA_FILE, "ab") as file:
+            if new_file:
+                file.write(DATA_HEADER.encode("utf-8"))
+            score_offsets.append(file.tell())
+            file.write(f"{timestamp},{start},{end},{attempts}\n".encode("utf-8"))
+        update_leaderboard(start, end, attempts)
+        if current_page == 0:
+            score_list.controls.insert(0, styled_text(format_record(timestamp, start, end, attempts),
+                                                      size=14, color="#dfe6e9"))
+            if len(score_list.controls) > PAGE_SIZE:
+                score_list.controls.pop()
+            update_pagination()
+        else:
+            # The new record shifts every page boundary by one: re-read the visible page
+            load_scores()
 
     def start_game(e):
         nonlocal target_number, attempts, range_start, range_end
@@ -126,7 +222,6 @@ def main(page: ft.Page):
                 result_text.value = f"🎉 Parabéns! Você acertou em {attempts} tentativas."
                 result_text.color = "#00b894"
                 save_score(attempts, range_start, range_end)
-                load_scores()
                 guess_input.visible = False
                 guess_button.visible = False
             elif guess < target_number:
@@ -158,8 +253,12 @@ def main(page: ft.Page):
         result_text,
         styled_text("🏆 Histórico de Pontuações", size=20, weight="bold", color="#00cec9", center=True),
         score_list,
+        ft.Row([newer_button, page_label, older_button], alignment="center"),
+        styled_text("🥇 Melhores Resultados", size=20, weight="bold", color="#00cec9", center=True),
+        leaderboard_list,
     )
 
+    index_scores()
     load_scores()
 
 ft.app(target=main)